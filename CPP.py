@@ -1,148 +1,396 @@
-"""
-    (A)
-   /   \
-  3     4
- /       \
-(B)---2---(C)
-    1
-    |
-   (D)
-   
-
-        A
-      /   \
-    2       3
-   B--- 7 ---CD
-   | \     / |
-   4  1   5  6
-   D--2--E-3-F
-
-"""
-# graph = {
-#     'A': [('B', 3), ('C', 4)],
-#     'B': [('A', 3), ('C', 2), ('D', 1)],
-#     'C': [('A', 4), ('B', 2)],
-#     'D': [('B', 1)]
-# }
-
-# graph = {
-#     'A': [('B', 2), ('C', 3)],
-#     'B': [('A', 2), ('C', 7), ('D', 4), ('E', 1)],
-#     'C': [('A', 3), ('B', 7), ('E', 5), ('F', 6)],
-#     'D': [('B', 4), ('E', 2)],
-#     'E': [('B', 1), ('C', 5), ('D', 2), ('F', 3)],
-#     'F': [('C', 6), ('E', 3)]
-# }
-
-graph = {
-    0: [(1, 1), (2, 2)],
-    1: [(0, 1), (3, 3), (2, 5)],
-    2: [(0, 2), (1, 5), (4, 4)],
-    3: [(1, 3), (4, 6), (5, 1)],
-    4: [(2, 4), (3, 6), (5, 1)],
-    5: [(3, 1), (4, 1)]
-}
-
-# Total edge weight
-def total_edge_weight(graph):
-    total = 0
-    for node in graph:
-        for neighbor, weight in graph[node]:
-            total += weight
-    return total // 2 
-
-# Find odd-degree nodes
-def odd_degree_nodes(graph):
-    odd = []
-    for node in graph:
-        degree = len(graph[node])
-        if degree % 2 == 1:
-            odd.append(node)
-    return odd
-
-# Djikstra
-def dijkstra(graph, start):
-    dist = {node: float('inf') for node in graph}
-    visited = {node: False for node in graph}
-    dist[start] = 0
-
-    while True:
-        min_node = None
-        min_dist = float('inf')
-        for node in graph:
-            if not visited[node] and dist[node] < min_dist:
-                min_dist = dist[node]
-                min_node = node
-
-        if min_node is None: 
-            break
-
-        visited[min_node] = True
-
-        for neighbor, weight in graph[min_node]:
-            if dist[min_node] + weight < dist[neighbor]:
-                dist[neighbor] = dist[min_node] + weight
-
-    return dist
-
-# Minimum weight
-def min_weight_matching(odd_nodes, dist_matrix):
-    if not odd_nodes:
-        return 0, []
-
-    best_cost = float('inf')
-    best_pairs = []
-
-    def helper(nodes, current_pairs, current_cost):
-        nonlocal best_cost, best_pairs
-        if not nodes:
-            if current_cost < best_cost:
-                best_cost = current_cost
-                best_pairs = current_pairs.copy()
-            return
-
-        first = nodes[0]
-        for i in range(1, len(nodes)):
-            second = nodes[i]
-            pair_cost = dist_matrix[first][second]
-            if current_cost + pair_cost >= best_cost:
-                continue
-            remaining = nodes[1:i] + nodes[i+1:]
-            current_pairs.append((first, second))
-            helper(remaining, current_pairs, current_cost + pair_cost)
-            current_pairs.pop()
-
-    helper(odd_nodes, [], 0)
-    return best_cost, best_pairs
-
-if __name__ == '__main__': 
-    print("===== Chinese Postman Problem =====\n")
-
-    total_weight = total_edge_weight(graph)
-    print(f"1) Total edge weight of graph: {total_weight}\n")
-
-    odd_nodes = odd_degree_nodes(graph)
-    print(f"2) Odd-degree nodes: {odd_nodes}\n")
-
-    print("3) Shortest paths between odd nodes:")
-    dist_matrix = {}
-    for node in odd_nodes:
-        dists = dijkstra(graph, node)
-        dist_matrix[node] = {}
-        for other in odd_nodes:
-            dist_matrix[node][other] = dists[other]
-            if node != other:
-                print(f"   {node} → {other} = {dists[other]}")
-    print()
-
-    extra_cost, best_pairing = min_weight_matching(odd_nodes, dist_matrix)
-    print(f"4) Best pairing of odd nodes: {best_pairing}")
-    print(f"   Extra cost to make all degrees even: {extra_cost}\n")
-
-    cpp_total = total_weight + extra_cost
-    print(f"5) Chinese Postman Problem total length = {cpp_total}")
-    print("=====================================================================")
-
-
-    
-    
+"""
+    (A)
+   /   \
+  3     4
+ /       \
+(B)---2---(C)
+    1
+    |
+   (D)
+   
+
+        A
+      /   \
+    2       3
+   B--- 7 ---CD
+   | \     / |
+   4  1   5  6
+   D--2--E-3-F
+
+"""
+# graph = {
+#     'A': [('B', 3), ('C', 4)],
+#     'B': [('A', 3), ('C', 2), ('D', 1)],
+#     'C': [('A', 4), ('B', 2)],
+#     'D': [('B', 1)]
+# }
+
+# graph = {
+#     'A': [('B', 2), ('C', 3)],
+#     'B': [('A', 2), ('C', 7), ('D', 4), ('E', 1)],
+#     'C': [('A', 3), ('B', 7), ('E', 5), ('F', 6)],
+#     'D': [('B', 4), ('E', 2)],
+#     'E': [('B', 1), ('C', 5), ('D', 2), ('F', 3)],
+#     'F': [('C', 6), ('E', 3)]
+# }
+
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count
+
+from graph_core import CSRGraph
+from solver_stats import phase
+
+graph = {
+    0: [(1, 1), (2, 2)],
+    1: [(0, 1), (3, 3), (2, 5)],
+    2: [(0, 2), (1, 5), (4, 4)],
+    3: [(1, 3), (4, 6), (5, 1)],
+    4: [(2, 4), (3, 6), (5, 1)],
+    5: [(3, 1), (4, 1)]
+}
+
+# Total edge weight
+def total_edge_weight(graph):
+    total = 0
+    for node in graph:
+        for neighbor, weight in graph[node]:
+            total += weight
+    return total // 2 
+
+# Find odd-degree nodes
+def odd_degree_nodes(graph):
+    odd = []
+    for node in graph:
+        degree = len(graph[node])
+        if degree % 2 == 1:
+            odd.append(node)
+    return odd
+
+# Djikstra (binary heap, stops early once every node in `targets` is settled)
+# Also returns each settled node's predecessor on its shortest path
+# `stats` (a SolverStats) counts heap pushes and settled nodes
+def dijkstra_with_paths(graph, start, targets=None, stats=None):
+    if isinstance(graph, CSRGraph):
+        index, nodes = graph.index, graph.nodes
+        target_ids = [index[t] for t in targets] if targets is not None else None
+        dist, prev = _dijkstra_csr(graph, index[start], target_ids, stats)
+        return (dict(zip(nodes, dist)),
+                {nodes[v]: (nodes[u] if u is not None else None) for v, u in prev.items()})
+
+    dist, prev = _dijkstra_dict(graph, start, targets, stats)
+    return {node: dist.get(node, float('inf')) for node in graph}, prev
+
+# The search itself; `dist` only holds the nodes reached, so a search that
+# stops early costs nothing for the rest of the graph
+def _dijkstra_dict(graph, start, targets=None, stats=None):
+    inf = float('inf')
+    dist = {start: 0}
+    prev = {start: None}
+    visited = set()
+
+    remaining = set(targets) if targets is not None else None
+    order = count()
+    heap = [(0, next(order), start)]
+
+    while heap:
+        node_dist, _, min_node = heapq.heappop(heap)
+        if min_node in visited:
+            continue
+
+        visited.add(min_node)
+        if remaining is not None:
+            remaining.discard(min_node)
+            if not remaining:
+                break
+
+        for neighbor, weight in graph[min_node]:
+            if node_dist + weight < dist.get(neighbor, inf):
+                dist[neighbor] = node_dist + weight
+                prev[neighbor] = min_node
+                heapq.heappush(heap, (dist[neighbor], next(order), neighbor))
+
+    if stats is not None:
+        stats.count('heap_pushes', next(order))
+        stats.count('nodes_settled', len(visited))
+
+    return dist, prev
+
+# Same search on a CSRGraph, over integer vertex ids; returns the flat
+# distance list and a predecessor dict, both by vertex id
+# `lists` are graph.adjacency_lists(), passed in to share them between the
+# searches of one batch; otherwise they are built just for this search
+def _dijkstra_csr(graph, source, targets=None, stats=None, lists=None):
+    offsets, neighbors, weights = lists if lists is not None else graph.adjacency_lists()
+    dist = [float('inf')] * len(graph)
+    prev = {source: None}
+    visited = bytearray(len(graph))
+    dist[source] = 0
+
+    remaining = set(targets) if targets is not None else None
+    heap = [(0, source)]
+    pushes = 1
+
+    while heap:
+        node_dist, min_node = heapq.heappop(heap)
+        if visited[min_node]:
+            continue
+
+        visited[min_node] = 1
+        if remaining is not None:
+            remaining.discard(min_node)
+            if not remaining:
+                break
+
+        for k in range(offsets[min_node], offsets[min_node + 1]):
+            neighbor = neighbors[k]
+            if node_dist + weights[k] < dist[neighbor]:
+                dist[neighbor] = node_dist + weights[k]
+                prev[neighbor] = min_node
+                heapq.heappush(heap, (dist[neighbor], neighbor))
+                pushes += 1
+
+    if stats is not None:
+        stats.count('heap_pushes', pushes)
+        stats.count('nodes_settled', sum(visited))
+
+    return dist, prev
+
+def dijkstra(graph, start, targets=None, stats=None):
+    return dijkstra_with_paths(graph, start, targets, stats)[0]
+
+# Shortest distances between every pair of odd nodes, one Dijkstra per source
+# With `with_paths`, each source's predecessor map is kept as well, so the
+# matched paths can be walked later without searching again
+_worker_graph = None
+_worker_targets = None
+_worker_paths = False
+_worker_lists = None
+
+def _init_distance_worker(graph, targets, with_paths=False):
+    global _worker_graph, _worker_targets, _worker_paths, _worker_lists
+    _worker_graph, _worker_targets, _worker_paths = graph, targets, with_paths
+    _worker_lists = graph.adjacency_lists() if isinstance(graph, CSRGraph) else None
+
+def _distance_row(source, stats=None):
+    graph, targets = _worker_graph, _worker_targets
+    if isinstance(graph, CSRGraph):
+        index = graph.index
+        dist, prev = _dijkstra_csr(graph, index[source], [index[t] for t in targets], stats,
+                                   _worker_lists)
+        row = {other: dist[index[other]] for other in targets}
+    else:
+        dist, prev = _dijkstra_dict(graph, source, targets, stats)
+        row = {other: dist.get(other, float('inf')) for other in targets}
+    return row, (prev if _worker_paths else None)
+
+# `stats` only sees the searches run in this process
+def odd_distance_matrix(graph, odd_nodes, workers=None, stats=None, with_paths=False):
+    if workers and workers > 1 and len(odd_nodes) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_distance_worker,
+                                 initargs=(graph, odd_nodes, with_paths)) as pool:
+            chunk = max(1, len(odd_nodes) // (workers * 4))
+            results = list(pool.map(_distance_row, odd_nodes, chunksize=chunk))
+    else:
+        _init_distance_worker(graph, odd_nodes, with_paths)
+        try:
+            results = [_distance_row(node, stats) for node in odd_nodes]
+        finally:
+            # don't keep the graph or its adjacency lists alive after the batch
+            _init_distance_worker(None, None)
+
+    dist_matrix = {node: row for node, (row, _) in zip(odd_nodes, results)}
+    if with_paths:
+        return dist_matrix, {node: prev for node, (_, prev) in zip(odd_nodes, results)}
+    return dist_matrix
+
+# Edges of the shortest path ending at `target`, walked back through a
+# predecessor map kept by odd_distance_matrix (vertex ids for a CSRGraph)
+def _path_edges(graph, prev, target):
+    edges = []
+    if isinstance(graph, CSRGraph):
+        nodes = graph.nodes
+        node = graph.index[target]
+        while prev[node] is not None:
+            edges.append((nodes[prev[node]], nodes[node]))
+            node = prev[node]
+    else:
+        node = target
+        while prev[node] is not None:
+            edges.append((prev[node], node))
+            node = prev[node]
+    return edges
+
+# Minimum weight (exhaustive branch and bound, only viable for a handful of nodes)
+def exhaustive_min_weight_matching(odd_nodes, dist_matrix):
+    if not odd_nodes:
+        return 0, []
+
+    best_cost = float('inf')
+    best_pairs = []
+
+    def helper(nodes, current_pairs, current_cost):
+        nonlocal best_cost, best_pairs
+        if not nodes:
+            if current_cost < best_cost:
+                best_cost = current_cost
+                best_pairs = current_pairs.copy()
+            return
+
+        first = nodes[0]
+        for i in range(1, len(nodes)):
+            second = nodes[i]
+            pair_cost = dist_matrix[first][second]
+            if current_cost + pair_cost >= best_cost:
+                continue
+            remaining = nodes[1:i] + nodes[i+1:]
+            current_pairs.append((first, second))
+            helper(remaining, current_pairs, current_cost + pair_cost)
+            current_pairs.pop()
+
+    helper(odd_nodes, [], 0)
+    return best_cost, best_pairs
+
+# Minimum weight perfect matching (Edmonds' blossom algorithm, O(n^3))
+# With `candidates` set, only each node's `candidates` closest partners are
+# offered to the blossom solver, falling back to every pair if that graph has
+# no perfect matching
+EXHAUSTIVE_MATCHING_LIMIT = 10
+
+def min_weight_matching(odd_nodes, dist_matrix, candidates=None):
+    if len(odd_nodes) <= EXHAUSTIVE_MATCHING_LIMIT:
+        return exhaustive_min_weight_matching(odd_nodes, dist_matrix)
+
+    import networkx as nx
+
+    def matching_graph(k):
+        G = nx.Graph()
+        G.add_nodes_from(odd_nodes)
+        for u in odd_nodes:
+            partners = [v for v in odd_nodes if v != u and dist_matrix[u][v] != float('inf')]
+            if k is not None:
+                partners = heapq.nsmallest(k, partners, key=dist_matrix[u].get)
+            for v in partners:
+                G.add_edge(u, v, distance=dist_matrix[u][v])
+        return G
+
+    G = matching_graph(candidates)
+    # Every perfect matching has the same number of edges, so maximising
+    # (offset - distance) minimises the total distance
+    offset = max((d for _, _, d in G.edges(data='distance')), default=0) + 1
+    for u, v, d in G.edges(data='distance'):
+        G[u][v]['weight'] = offset - d
+
+    matching = nx.max_weight_matching(G, maxcardinality=True)
+    if 2 * len(matching) != len(odd_nodes):
+        if candidates is not None:
+            return min_weight_matching(odd_nodes, dist_matrix)
+        return float('inf'), []
+
+    index = {node: i for i, node in enumerate(odd_nodes)}
+    pairs = sorted((tuple(sorted(pair, key=index.get)) for pair in matching),
+                   key=lambda pair: index[pair[0]])
+    return sum(dist_matrix[u][v] for u, v in pairs), pairs
+
+# Closed walk using every edge exactly once (iterative Hierholzer, O(E))
+# `edges` is a list of (u, v) pairs; parallel edges are allowed
+def eulerian_circuit(edges, start):
+    incident = {}
+    for e, (u, v) in enumerate(edges):
+        incident.setdefault(u, []).append(e)
+        incident.setdefault(v, []).append(e)
+
+    used = bytearray(len(edges))
+    next_edge = {node: 0 for node in incident}
+    stack = [start]
+    circuit = []
+
+    while stack:
+        node = stack[-1]
+        node_edges = incident.get(node, [])
+        i = next_edge.get(node, 0)
+        while i < len(node_edges) and used[node_edges[i]]:
+            i += 1
+        next_edge[node] = i
+
+        if i == len(node_edges):
+            circuit.append(stack.pop())
+        else:
+            e = node_edges[i]
+            used[e] = 1
+            u, v = edges[e]
+            stack.append(v if u == node else u)
+
+    if len(circuit) != len(edges) + 1:
+        raise ValueError("Graph is not connected: no closed walk covers every edge")
+    circuit.reverse()
+    return circuit
+
+# Chinese Postman: duplicate the shortest paths between matched odd nodes,
+# then walk the resulting Eulerian multigraph
+# `stats` (a SolverStats) times each phase and counts the work done in it
+def chinese_postman(graph, workers=None, candidates=None, stats=None):
+    index = {node: i for i, node in enumerate(graph)}
+    edges = []
+    base_cost = 0
+    for node in graph:
+        for neighbor, weight in graph[node]:
+            if index[node] <= index[neighbor]:
+                edges.append((node, neighbor))
+                base_cost += weight
+
+    odd_nodes = odd_degree_nodes(graph)
+    with phase(stats, 'distances'):
+        dist_matrix, prevs = odd_distance_matrix(graph, odd_nodes, workers, stats,
+                                                 with_paths=True)
+    with phase(stats, 'matching'):
+        extra_cost, pairs = min_weight_matching(odd_nodes, dist_matrix, candidates)
+    if extra_cost == float('inf'):
+        raise ValueError("Graph is not connected: odd nodes cannot be paired")
+
+    with phase(stats, 'duplicate_paths'):
+        added = len(edges)
+        # the search from u ran until every odd node was settled, so its
+        # predecessors already hold a shortest path to v
+        for u, v in pairs:
+            edges.extend(_path_edges(graph, prevs[u], v))
+    if stats is not None:
+        stats.count('odd_nodes', len(odd_nodes))
+        stats.count('matched_pairs', len(pairs))
+        stats.count('duplicated_edges', len(edges) - added)
+
+    if not edges:
+        return 0, [next(iter(graph))] if graph else []
+    with phase(stats, 'circuit'):
+        route = eulerian_circuit(edges, edges[0][0])
+    return base_cost + extra_cost, route
+
+if __name__ == '__main__': 
+    print("===== Chinese Postman Problem =====\n")
+
+    total_weight = total_edge_weight(graph)
+    print(f"1) Total edge weight of graph: {total_weight}\n")
+
+    odd_nodes = odd_degree_nodes(graph)
+    print(f"2) Odd-degree nodes: {odd_nodes}\n")
+
+    print("3) Shortest paths between odd nodes:")
+    dist_matrix = odd_distance_matrix(graph, odd_nodes)
+    for node in odd_nodes:
+        for other in odd_nodes:
+            if node != other:
+                print(f"   {node} → {other} = {dist_matrix[node][other]}")
+    print()
+
+    extra_cost, best_pairing = min_weight_matching(odd_nodes, dist_matrix)
+    print(f"4) Best pairing of odd nodes: {best_pairing}")
+    print(f"   Extra cost to make all degrees even: {extra_cost}\n")
+
+    cpp_total, route = chinese_postman(graph)
+    print(f"5) Chinese Postman Problem total length = {cpp_total}")
+    print(f"   Route: {' → '.join(str(node) for node in route)}")
+    print("=====================================================================")
+
+
+    
+    
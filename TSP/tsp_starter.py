@@ -1,23 +1,83 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.spatial.distance import euclidean
+import argparse
 import os
+import sys
+import math
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
+# The shared helpers live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from array_io import attach_shared_arrays, read_csv_chunks, share_array, shared_arrays
+from solver_stats import SolverStats, phase
 
-filename = 'small.csv' 
 
-plt.ion()   
+# Rows parsed per chunk when reading a city CSV
+CSV_CHUNK_ROWS = 100000
 
-def read_cities(filepath):
+# Minimum gain for a local search move to count as an improvement
+EPSILON = 1e-9
+
+# Initial number of neighbours fetched per nearest-unvisited query
+NN_QUERY_SIZE = 8
+
+# Default size of the per-city candidate lists used by local search
+NEIGHBOR_LIST_SIZE = 10
+
+# Longest run of cities Or-Opt will relocate
+OR_OPT_SEGMENT = 3
+
+# Maximum number of steps in a Lin-Kernighan move chain
+LK_DEPTH = 5
+
+# How solve_christofides matches the odd-degree cities; only 'exact' keeps
+# the 1.5x bound, the others trade it for speed on large inputs
+CHRISTOFIDES_MATCHINGS = ('exact', 'candidates', 'greedy')
+
+# Matching used when Christofides is stage 1 of tsp_solver_smart: local
+# search follows anyway, and 'exact' takes minutes from ~1000 cities up
+SMART_CHRISTOFIDES_MATCHING = 'candidates'
+
+# Stage 1 tour constructors accepted by tsp_solver_smart
+CONSTRUCTIONS = ('nearest_neighbor', 'christofides')
+
+
+def read_cities(filepath, cache=True):
     '''
     Load a TSP dataset.
+
+    The CSV is parsed in chunks of CSV_CHUNK_ROWS rows. With `cache` on, the
+    parsed array is saved next to the CSV as `<name>.csv.npy` and
+    memory-mapped on later loads, as long as it is newer than the CSV. The
+    cache is written to a temporary file and renamed into place, so a
+    parallel run never maps a half-written file.
     '''
     if not os.path.exists(filepath):
-        print(f"Error: The file '{filepath}' was not found in this folder.")
-        print("Please ensure 'small.csv' is in the same directory as this script.")
-        exit(1)
-        
-    cities = np.loadtxt(filepath, delimiter=',')
+        raise FileNotFoundError(f"The file '{filepath}' was not found. Please ensure "
+                                f"it exists or pass the path to a dataset like 'small.csv'.")
+
+    cache_path = os.fspath(filepath) + '.npy'
+    if cache and os.path.exists(cache_path) and \
+            os.path.getmtime(cache_path) >= os.path.getmtime(filepath):
+        return np.load(cache_path, mmap_mode='r')
+
+    chunks = list(read_csv_chunks(filepath, CSV_CHUNK_ROWS))
+    cities = np.concatenate(chunks) if chunks else np.empty((0, 2))
+
+    if cache:
+        tmp_path = None
+        try:
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(cache_path)),
+                                             prefix=os.path.basename(cache_path) + '.',
+                                             suffix='.tmp', delete=False) as f:
+                tmp_path = f.name
+                np.save(f, cities)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
     return cities
 
 
@@ -25,6 +85,7 @@ def score_solution(cities, solution):
     '''
     Calculate the total distance traveled by the given solution.
     '''
+    solution = np.asarray(solution)
     if len(solution) != len(cities):
         raise Exception(('Invalid solution: len(solution) is {}, ' + \
                 'but it should be {}.').format(len(solution), len(cities)))
@@ -40,11 +101,29 @@ def score_solution(cities, solution):
     return np.sum(distances)
 
 
+def city_distance(cities, a, b):
+    '''
+    Euclidean distance between cities `a` and `b` (indices or index arrays).
+    '''
+    diff = cities[a] - cities[b]
+    return np.sqrt(np.sum(diff**2, axis=-1))
+
+
+def _pyplot():
+    '''
+    Imports pyplot in interactive mode on first use, so runs that never plot
+    do not pay for (or need a display for) matplotlib.
+    '''
+    import matplotlib.pyplot as plt
+    plt.ion()
+    return plt
+
+
 def create_figure():
     '''
     Creates a figure which `visualize_solution()` will draw onto.
     '''
-    fig, axes = plt.subplots(1, 2, figsize=(15, 7))
+    fig, axes = _pyplot().subplots(1, 2, figsize=(15, 7))
     return fig, axes
 
 
@@ -54,6 +133,7 @@ def visualize_solution(cities, solution, fig=None, axes=None, block=True):
     '''
     dist = score_solution(cities, solution) if len(solution) == len(cities) else float('NaN')
 
+    plt = _pyplot()
     if fig is None or axes is None:
         fig, axes = create_figure()
     ax1, ax2 = axes
@@ -87,103 +167,901 @@ def visualize_solution(cities, solution, fig=None, axes=None, block=True):
         plt.pause(0.001)
 
 
-def solve_nearest_neighbor(cities):
+def solve_nearest_neighbor(cities, start=0):
     """
-    Greedy algorithm: always go to the nearest unvisited city.
+    Greedy algorithm: always go to the nearest unvisited city, from `start`.
+    Candidates come from a KD-tree query; visited cities are skipped lazily
+    and the tree is rebuilt over the unvisited ones once half of it is stale.
+    Ties are broken towards the lowest city index.
     """
+    from scipy.spatial import cKDTree
+
     N = len(cities)
-    unvisited = set(range(1, N))
-    current_city = 0
-    solution = [0]
-
-    while unvisited:
-        best_dist = float('inf')
-        nearest = None
-        
-        for candidate in unvisited:
-            d = euclidean(cities[current_city], cities[candidate])
-            if d < best_dist:
-                best_dist = d
-                nearest = candidate
-        
+    visited = np.zeros(N, dtype=bool)
+    visited[start] = True
+    current_city = start
+    solution = [start]
+
+    remaining = np.arange(N)
+    tree = cKDTree(cities)
+    stale = 1
+
+    while len(solution) < N:
+        if stale * 2 > len(remaining):
+            remaining = remaining[~visited[remaining]]
+            tree = cKDTree(cities[remaining])
+            stale = 0
+
+        k = min(NN_QUERY_SIZE, len(remaining))
+        while True:
+            dists, idx = tree.query(cities[current_city], k=k)
+            dists = np.atleast_1d(dists)
+            candidates = remaining[np.atleast_1d(idx)]
+            unvisited = ~visited[candidates]
+
+            # Only trust the answer if nothing beyond the k-th hit can tie it
+            if unvisited.any():
+                best_dist = dists[unvisited].min()
+                if k == len(remaining) or dists[-1] > best_dist:
+                    break
+            k = min(k * 2, len(remaining))
+
+        nearest = candidates[unvisited & (dists == best_dist)].min()
+
         solution.append(nearest)
-        unvisited.remove(nearest)
+        visited[nearest] = True
+        stale += 1
         current_city = nearest
-        
+
     return np.array(solution)
 
 
-def solve_2opt(cities, solution, callback=None):
+def euclidean_mst(cities):
+    '''
+    Minimum spanning tree of the complete Euclidean graph over `cities`, as
+    an (N - 1, 2) array of city index pairs. The Euclidean MST is a subgraph
+    of the Delaunay triangulation, so Kruskal only has to sort O(N) edges;
+    cities the triangulation skips (duplicates) are tied to the vertex they
+    coincide with. Degenerate inputs (too few or collinear cities) fall back
+    to the O(N^2) dense Prim's.
+    '''
+    from scipy.spatial import Delaunay, QhullError
+    from kruskal import kruskals_arrays
+    from prims_trial2 import prims_dense
+
+    N = len(cities)
+    try:
+        if N < 4:
+            raise QhullError("too few cities")
+        triangulation = Delaunay(cities)
+    except QhullError:
+        edges, _ = prims_dense(coordinates=cities)
+        return np.array(edges, dtype=int).reshape(-1, 2)
+
+    simplices = triangulation.simplices
+    corners = simplices.shape[1]
+    pairs = np.vstack([simplices[:, [i, j]] for i in range(corners)
+                       for j in range(i + 1, corners)])
+    if len(triangulation.coplanar):
+        pairs = np.vstack([pairs, triangulation.coplanar[:, [0, 2]]])
+    pairs = np.unique(np.sort(pairs, axis=1), axis=0)
+
+    weights = np.linalg.norm(cities[pairs[:, 0]] - cities[pairs[:, 1]], axis=1)
+    accepted, _ = kruskals_arrays(N, pairs[:, 0], pairs[:, 1], weights)
+    return pairs[accepted]
+
+
+def _greedy_matching(cities, nodes, k=NEIGHBOR_LIST_SIZE):
+    '''
+    Pairs up `nodes` (an even count) shortest candidate edge first, taking
+    candidates from each node's `k` nearest others. Nodes left unmatched go
+    through another round among themselves; the globally shortest candidate
+    always joins both ends, so every round makes progress.
+    '''
+    pairs = []
+    nodes = np.asarray(nodes)
+    while len(nodes):
+        points = cities[nodes]
+        idx = build_neighbor_lists(points, k)
+        src = np.repeat(np.arange(len(nodes)), idx.shape[1])
+        dst = idx.ravel()
+        order = np.argsort(np.hypot(*(points[src] - points[dst]).T), kind='stable')
+
+        matched = np.zeros(len(nodes), dtype=bool)
+        for u, v in zip(src[order].tolist(), dst[order].tolist()):
+            if not matched[u] and not matched[v]:
+                matched[u] = matched[v] = True
+                pairs.append((int(nodes[u]), int(nodes[v])))
+        nodes = nodes[~matched]
+    return pairs
+
+
+def solve_christofides(cities, matching='exact', stats=None):
+    '''
+    Christofides construction: Euclidean MST, a matching of its odd-degree
+    cities, then an Eulerian circuit of the combined multigraph with
+    repeated cities skipped.
+
+    `matching` is one of CHRISTOFIDES_MATCHINGS:
+    - 'exact' (default): minimum weight perfect matching over all pairs of
+      odd cities with the blossom algorithm from CPP.py. The tour is then at
+      most 1.5x optimal, but blossom is O(n^3) in pure Python, so this gets
+      slow beyond a few hundred odd cities.
+    - 'candidates': blossom offered only each city's NEIGHBOR_LIST_SIZE
+      nearest odd cities (all pairs if that has no perfect matching). Much
+      faster; not guaranteed minimum, so there is no 1.5x bound.
+    - 'greedy': shortest candidate pair first. Near-linear, no bound.
+    '''
+    from CPP import eulerian_circuit, min_weight_matching
+
+    if matching not in CHRISTOFIDES_MATCHINGS:
+        raise ValueError("Unknown matching '{}', expected one of {}".format(
+            matching, CHRISTOFIDES_MATCHINGS))
+
+    N = len(cities)
+    if N < 3:
+        return np.arange(N)
+
+    with phase(stats, 'mst'):
+        mst = euclidean_mst(cities)
+    odd = np.flatnonzero(np.bincount(mst.ravel(), minlength=N) % 2)
+
+    with phase(stats, 'matching'):
+        if matching == 'greedy':
+            pairs = _greedy_matching(cities, odd)
+        else:
+            points = cities[odd]
+            dist_matrix = {}
+            for i, u in enumerate(odd.tolist()):
+                row = np.hypot(*(points - points[i]).T).tolist()
+                dist_matrix[u] = dict(zip(odd.tolist(), row))
+            candidates = NEIGHBOR_LIST_SIZE if matching == 'candidates' else None
+            _, pairs = min_weight_matching(odd.tolist(), dist_matrix, candidates=candidates)
+
+    with phase(stats, 'shortcut'):
+        circuit = eulerian_circuit(mst.tolist() + list(pairs), int(mst[0, 0]))
+        # Keep each city's first visit, in circuit order
+        _, first = np.unique(circuit, return_index=True)
+        solution = np.asarray(circuit)[np.sort(first)]
+
+    if stats is not None:
+        stats.count('odd_vertices', len(odd))
+    return solution
+
+
+def solve_2opt(cities, solution, callback=None, stats=None):
     """
     Iteratively reverse segments of the path to untangle crossings.
+    Reversing solution[i..j] only swaps edges (a, b) and (c, d) for (a, c)
+    and (b, d), so each candidate is scored by that four-edge delta and the
+    best move for a given i is applied in place before scanning on.
+    With a SolverStats as `stats`, moves evaluated and applied are counted.
     """
-    best_solution = solution.copy()
-    best_dist = score_solution(cities, best_solution)
+    best_solution = np.array(solution, dtype=int)
+    N = len(best_solution)
     improved = True
-    
+
     count = 0
 
     while improved:
         improved = False
-        N = len(best_solution)
-        
-        for i in range(N - 1):
-            for j in range(i + 1, N):
-                if j - i == 1: continue 
-                
-                new_solution = best_solution.copy()
-                new_solution[i:j] = best_solution[i:j][::-1] 
-                
-                new_dist = score_solution(cities, new_solution)
-                
-                if new_dist < best_dist:
-                    best_dist = new_dist
-                    best_solution = new_solution
-                    improved = True
-                    count += 1
-                    
-                    if callback and count % 2 == 0: 
-                        callback(best_solution)
-                    
-                    break 
-            if improved: break
-            
+
+        for i in range(1, N - 1):
+            while True:
+                a = best_solution[i - 1]
+                b = best_solution[i]
+                c = best_solution[i + 1:]
+                d = np.append(best_solution[i + 2:], best_solution[0])
+
+                delta = (city_distance(cities, a, c) + city_distance(cities, b, d)) - \
+                        (city_distance(cities, a, b) + city_distance(cities, c, d))
+
+                if stats is not None:
+                    stats.count('two_opt_evaluated', len(delta))
+                k = np.argmin(delta)
+                if delta[k] >= -EPSILON:
+                    break
+
+                j = i + 1 + k
+                best_solution[i:j + 1] = best_solution[i:j + 1][::-1]
+                improved = True
+                count += 1
+
+                if callback and count % 2 == 0:
+                    callback(best_solution.copy())
+
+    if stats is not None:
+        stats.count('two_opt_applied', count)
+    score_solution(cities, best_solution)
     return best_solution
 
 
-def tsp_solver_smart(cities, new_best_solution_func=None):
+class Tour:
+    """
+    A cyclic tour stored as a two-level list: the city sequence is cut into
+    about sqrt(N) segments, each with its own reversed bit and a rank in the
+    segment order. `next`, `prev` and `between` are O(1); `reverse` splits at
+    most two segments and flips the run of segments between them, so it costs
+    O(sqrt N). The segments are rebuilt once splits have doubled their count,
+    which keeps the amortized cost at O(sqrt N).
+    """
+
+    def __init__(self, solution):
+        sequence = np.asarray(solution, dtype=int).tolist()
+        self.N = len(sequence)
+        self.segment_size = max(8, math.isqrt(self.N))
+        self.max_segments = 2 * (-(-self.N // self.segment_size)) + 2
+        self.segment_of = [0] * self.N
+        self.index = [0] * self.N
+        self._build(sequence)
+
+    def _build(self, sequence):
+        size = self.segment_size
+        self.segments = [sequence[i:i + size] for i in range(0, self.N, size)]
+        self.flipped = [False] * len(self.segments)
+        self.order = list(range(len(self.segments)))
+        self.rank = list(range(len(self.segments)))
+        for s, segment in enumerate(self.segments):
+            for i, city in enumerate(segment):
+                self.segment_of[city] = s
+                self.index[city] = i
+
+    def __len__(self):
+        return self.N
+
+    def __iter__(self):
+        for s in self.order:
+            segment = self.segments[s]
+            yield from (reversed(segment) if self.flipped[s] else segment)
+
+    def __array__(self, dtype=None, copy=None):
+        return np.fromiter(self, dtype=dtype or int, count=self.N)
+
+    def to_array(self):
+        return np.fromiter(self, dtype=int, count=self.N)
+
+    def _offset(self, city):
+        s = self.segment_of[city]
+        i = self.index[city]
+        return len(self.segments[s]) - 1 - i if self.flipped[s] else i
+
+    def _key(self, city):
+        return self.rank[self.segment_of[city]], self._offset(city)
+
+    def next(self, city):
+        s = self.segment_of[city]
+        segment = self.segments[s]
+        i = self.index[city]
+        if self.flipped[s]:
+            if i > 0:
+                return segment[i - 1]
+        elif i + 1 < len(segment):
+            return segment[i + 1]
+        t = self.order[(self.rank[s] + 1) % len(self.order)]
+        return self.segments[t][-1 if self.flipped[t] else 0]
+
+    def prev(self, city):
+        s = self.segment_of[city]
+        segment = self.segments[s]
+        i = self.index[city]
+        if not self.flipped[s]:
+            if i > 0:
+                return segment[i - 1]
+        elif i + 1 < len(segment):
+            return segment[i + 1]
+        t = self.order[self.rank[s] - 1]
+        return self.segments[t][0 if self.flipped[t] else -1]
+
+    def between(self, a, b, c):
+        '''
+        True if `b` lies on the forward path from `a` to `c` (inclusive).
+        '''
+        ka, kb, kc = self._key(a), self._key(b), self._key(c)
+        if ka <= kc:
+            return ka <= kb <= kc
+        return kb >= ka or kb <= kc
+
+    def _split(self, city):
+        '''
+        Cut the segment holding `city` so that `city` starts a segment.
+        '''
+        k = self._offset(city)
+        if k == 0:
+            return
+        s = self.segment_of[city]
+        segment = self.segments[s]
+        if self.flipped[s]:
+            segment = segment[::-1]
+        head, tail = segment[:k], segment[k:]
+
+        t = len(self.segments)
+        self.segments[s] = head
+        self.flipped[s] = False
+        self.segments.append(tail)
+        self.flipped.append(False)
+        for i, c in enumerate(head):
+            self.index[c] = i
+        for i, c in enumerate(tail):
+            self.segment_of[c] = t
+            self.index[c] = i
+
+        r = self.rank[s] + 1
+        self.order.insert(r, t)
+        self.rank.append(r)
+        for j in range(r + 1, len(self.order)):
+            self.rank[self.order[j]] = j
+
+    def reverse(self, first, last):
+        '''
+        Reverse the path that runs forward from city `first` to city `last`.
+        '''
+        if first == last:
+            return
+        if len(self.segments) + 2 > self.max_segments:
+            self._build(list(self))
+
+        after = self.next(last)
+        self._split(first)
+        self._split(after)
+
+        r1 = self.rank[self.segment_of[first]]
+        r2 = self.rank[self.segment_of[last]]
+        if r1 > r2:
+            # The path wraps around; reversing the rest gives the same cycle
+            r1, r2 = r2 + 1, r1 - 1
+            if r1 > r2:
+                return
+
+        block = self.order[r1:r2 + 1][::-1]
+        self.order[r1:r2 + 1] = block
+        for j, s in enumerate(block, r1):
+            self.rank[s] = j
+            self.flipped[s] = not self.flipped[s]
+
+    def reverse_path(self, before, first, last):
+        '''
+        Reverse the path between cities `first` and `last`, where `before` is
+        the city adjacent to `first` just outside the path.
+        '''
+        if self.next(before) == first:
+            self.reverse(first, last)
+        else:
+            self.reverse(last, first)
+
+
+def build_neighbor_lists(cities, k=NEIGHBOR_LIST_SIZE):
+    """
+    For every city, the indices of its `k` nearest other cities, closest first.
+    """
+    from scipy.spatial import cKDTree
+
+    N = len(cities)
+    k = min(k, N - 1)
+    if k < 1:
+        return np.empty((N, 0), dtype=int)
+    _, idx = cKDTree(cities).query(cities, k=k + 1)
+    idx = np.asarray(idx).reshape(N, k + 1)
+
+    # With duplicate cities the city itself need not come first (or at all),
+    # so drop it wherever it is, or drop the farthest hit if it is missing
+    is_self = idx == np.arange(N)[:, None]
+    is_self[~is_self.any(axis=1), -1] = True
+    return idx[~is_self].reshape(N, k)
+
+
+def solve_2opt_neighbors(cities, solution, neighbors, callback=None, time_limit=None,
+                         stats=None):
+    """
+    2-Opt restricted to candidate neighbour lists with don't-look bits.
+    A move from city a only considers new edges (a, c) for c in a's neighbour
+    list that are shorter than the edge they replace, and only cities whose
+    tour neighbourhood changed are queued for another look. Stops early once
+    `time_limit` seconds have passed. `stats` counts cities examined and
+    moves applied.
+    """
+    tour = Tour(solution)
+    N = len(tour)
+
+    xs, ys = cities[:, 0].tolist(), cities[:, 1].tolist()
+    candidates = np.asarray(neighbors).tolist()
+
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+    def dist(a, b):
+        return math.hypot(xs[a] - xs[b], ys[a] - ys[b])
+
+    queue = deque(tour)
+    queued = np.ones(N, dtype=bool)
+    count = 0
+    examined = 0
+
+    while queue:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        a = queue.popleft()
+        queued[a] = False
+        examined += 1
+
+        for forward in (True, False):
+            step = tour.next if forward else tour.prev
+            b = step(a)
+            d_ab = dist(a, b)
+            move = None
+
+            for c in candidates[a]:
+                d_ac = dist(a, c)
+                if d_ac >= d_ab:
+                    break
+                d = step(c)
+                if c == a or c == b or d == a:
+                    continue
+                delta = d_ac + dist(b, d) - d_ab - dist(c, d)
+                if delta < -EPSILON:
+                    move = (c, d)
+                    break
+
+            if move is None:
+                continue
+
+            c, d = move
+            if forward:
+                tour.reverse(b, c)
+            else:
+                tour.reverse(c, b)
+
+            for city in (a, b, c, d):
+                if not queued[city]:
+                    queued[city] = True
+                    queue.append(city)
+
+            count += 1
+            if callback and count % 2 == 0:
+                callback(tour.to_array())
+            break
+
+    if stats is not None:
+        stats.count('two_opt_examined', examined)
+        stats.count('two_opt_applied', count)
+    solution = tour.to_array()
+    score_solution(cities, solution)
+    return solution
+
+
+def solve_or_opt(cities, solution, neighbors, callback=None, time_limit=None, stats=None):
+    """
+    Or-Opt: relocate a run of up to OR_OPT_SEGMENT cities, possibly reversed,
+    between two adjacent cities close to one of its ends. Stops early once
+    `time_limit` seconds have passed. `stats` counts cities examined and
+    moves applied.
+    """
+    N = len(solution)
+    if N < OR_OPT_SEGMENT + 3:
+        return np.array(solution, copy=True)
+    tour = Tour(solution)
+
+    xs, ys = cities[:, 0].tolist(), cities[:, 1].tolist()
+    candidates = np.asarray(neighbors).tolist()
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+    def dist(a, b):
+        return math.hypot(xs[a] - xs[b], ys[a] - ys[b])
+
+    succ, pred = tour.next, tour.prev
+
+    def find_move(s1):
+        segment = [s1]
+        for _ in range(OR_OPT_SEGMENT):
+            s2 = segment[-1]
+            p, n = pred(s1), succ(s2)
+            removal_gain = dist(p, s1) + dist(s2, n) - dist(p, n)
+
+            if removal_gain > EPSILON:
+                for end, other in ((s1, s2), (s2, s1)):
+                    for c in candidates[end]:
+                        d_ce = dist(c, end)
+                        if d_ce >= removal_gain:
+                            break
+                        if c in segment:
+                            continue
+                        for x in (succ(c), pred(c)):
+                            if x in segment:
+                                continue
+                            delta = d_ce + dist(other, x) - dist(c, x) - removal_gain
+                            if delta < -EPSILON:
+                                return segment, p, n, c, x, end
+
+            segment.append(n)
+        return None
+
+    queue = deque(tour)
+    queued = np.ones(N, dtype=bool)
+    count = 0
+    examined = 0
+
+    while queue:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        s1 = queue.popleft()
+        queued[s1] = False
+        examined += 1
+
+        move = find_move(s1)
+        if move is None:
+            continue
+
+        segment, p, n, c, x, end = move
+        s2 = segment[-1]
+        # Orient the insertion edge as (u, v) with v following u
+        u, v = (c, x) if x == succ(c) else (x, c)
+        first_at_u = (u == c) == (end == s1)
+
+        # p S n .. u v  ->  p u .. n S' v  ->  p n .. u S' v  (-> p n .. u S v)
+        tour.reverse_path(p, s1, u)
+        tour.reverse_path(p, u, n)
+        if first_at_u:
+            tour.reverse_path(u, s2, s1)
+
+        for city in (p, n, s1, s2, u, v):
+            if not queued[city]:
+                queued[city] = True
+                queue.append(city)
+
+        count += 1
+        if callback and count % 2 == 0:
+            callback(tour.to_array())
+
+    if stats is not None:
+        stats.count('or_opt_examined', examined)
+        stats.count('or_opt_applied', count)
+    solution = tour.to_array()
+    score_solution(cities, solution)
+    return solution
+
+
+def solve_lin_kernighan(cities, solution, neighbors, callback=None, time_limit=None,
+                        depth=LK_DEPTH, stats=None):
+    """
+    Lin-Kernighan style k-opt. From an edge (t1, t2) it adds (t2, t3) for t3
+    in t2's neighbour list and breaks (t3, t4) with a 2-opt reversal, chaining
+    up to `depth` such steps while the running gain stays positive. The best
+    closed tour seen along the chain is kept and later steps are undone.
+    Stops early once `time_limit` seconds have passed. `stats` counts cities
+    examined and improving chains applied.
+    """
+    N = len(solution)
+    if N < 5:
+        return np.array(solution, copy=True)
+    tour = Tour(solution)
+
+    xs, ys = cities[:, 0].tolist(), cities[:, 1].tolist()
+    candidates = np.asarray(neighbors).tolist()
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+    def dist(a, b):
+        return math.hypot(xs[a] - xs[b], ys[a] - ys[b])
+
+    def improve_from(t1, t2):
+        gain = dist(t1, t2)
+        best_gain, best_steps = 0, 0
+        applied = []
+        added = set()
+        touched = [t1, t2]
+
+        for _ in range(depth):
+            back = tour.prev if tour.next(t1) == t2 else tour.next
+            best = None
+            for t3 in candidates[t2]:
+                partial = gain - dist(t2, t3)
+                if partial <= EPSILON:
+                    break
+                if t3 == t1 or t3 == t2:
+                    continue
+                t4 = back(t3)
+                if t4 == t2 or (min(t3, t4), max(t3, t4)) in added:
+                    continue
+                score = partial + dist(t3, t4)
+                if best is None or score > best[0]:
+                    best = (score, t3, t4)
+
+            if best is None:
+                break
+            gain, t3, t4 = best
+
+            # t1 t2 .. t4 t3  ->  t1 t4 .. t2 t3
+            tour.reverse_path(t1, t2, t4)
+            applied.append((t2, t4))
+            added.add((min(t2, t3), max(t2, t3)))
+            touched += [t3, t4]
+
+            closed_gain = gain - dist(t4, t1)
+            if closed_gain > best_gain + EPSILON:
+                best_gain, best_steps = closed_gain, len(applied)
+            t2 = t4
+
+        while len(applied) > best_steps:
+            t2, t4 = applied.pop()
+            tour.reverse_path(t1, t4, t2)
+
+        return best_steps > 0, touched
+
+    queue = deque(tour)
+    queued = np.ones(N, dtype=bool)
+    count = 0
+    examined = 0
+
+    while queue:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        t1 = queue.popleft()
+        queued[t1] = False
+        examined += 1
+
+        for t2 in (tour.next(t1), tour.prev(t1)):
+            improved, touched = improve_from(t1, t2)
+            if not improved:
+                continue
+
+            for city in touched:
+                if not queued[city]:
+                    queued[city] = True
+                    queue.append(city)
+
+            count += 1
+            if callback and count % 2 == 0:
+                callback(tour.to_array())
+            break
+
+    if stats is not None:
+        stats.count('lk_examined', examined)
+        stats.count('lk_applied', count)
+    solution = tour.to_array()
+    score_solution(cities, solution)
+    return solution
+
+
+def tsp_solver_smart(cities, new_best_solution_func=None, neighbors=None, time_limit=None,
+                     workers=None, stats=None, construction='nearest_neighbor',
+                     matching=SMART_CHRISTOFIDES_MATCHING):
     '''
     Solver Logic:
-    1. Greedy Nearest Neighbor
+    1. Greedy Nearest Neighbor, or Christofides with
+       construction='christofides' (see CONSTRUCTIONS), whose odd-city
+       `matching` is one of CHRISTOFIDES_MATCHINGS ('candidates' by
+       default; pass 'exact' for the 1.5x bound on small inputs)
     2. 2-Opt Local Search
+    3. Or-Opt Segment Relocation
+    4. Lin-Kernighan Style k-Opt
+
+    If `neighbors` is given, 2-Opt only examines moves towards each city's
+    `neighbors` nearest cities, using don't-look bits. Steps 3 and 4 always
+    use neighbour lists and share a budget of `time_limit` seconds.
+
+    If `workers` is given, randomized restarts of the whole pipeline run in
+    that many processes instead (see `tsp_solver_parallel`). The restarts
+    always start from nearest neighbour tours, so `workers` cannot be
+    combined with construction='christofides'.
+
+    The step messages are printed, or passed to `stats.log` when a
+    SolverStats is given as `stats`; it also gets each step's time and the
+    local search counters.
     '''
-    print("Step 1: Calculating Greedy Nearest Neighbor...")
-    initial_solution = solve_nearest_neighbor(cities)
+    if construction not in CONSTRUCTIONS:
+        raise ValueError("Unknown construction '{}', expected one of {}".format(
+            construction, CONSTRUCTIONS))
+    if workers and construction != 'nearest_neighbor':
+        raise ValueError("Randomized restarts (workers) only support "
+                         "construction='nearest_neighbor'")
+    log = stats.log if stats is not None else print
+
+    if workers:
+        log(f"Running randomized restarts on {workers} workers...")
+        with phase(stats, 'restarts'):
+            solution, report = tsp_solver_parallel(cities, workers,
+                                                   time_limit if time_limit is not None else 10.0,
+                                                   neighbors=neighbors or NEIGHBOR_LIST_SIZE)
+        for worker_stats in report:
+            log(f"  Worker {worker_stats['worker']}: {worker_stats['restarts']} restarts, "
+                f"best {worker_stats['best_distance']:.4f}")
+        if stats is not None:
+            stats.count('restarts', sum(worker_stats['restarts'] for worker_stats in report))
+        if new_best_solution_func:
+            new_best_solution_func(solution)
+        return solution
+
+    if construction == 'christofides':
+        log("Step 1: Building a Christofides Tour...")
+        with phase(stats, 'christofides'):
+            initial_solution = solve_christofides(cities, matching, stats=stats)
+    else:
+        log("Step 1: Calculating Greedy Nearest Neighbor...")
+        with phase(stats, 'nearest_neighbor'):
+            initial_solution = solve_nearest_neighbor(cities)
     if new_best_solution_func:
         new_best_solution_func(initial_solution)
-    
-    print("Step 2: Optimizing with 2-Opt (Local Search)...")
-    final_solution = solve_2opt(cities, initial_solution, new_best_solution_func)
-    
+
+    with phase(stats, 'neighbor_lists'):
+        candidates = build_neighbor_lists(cities, neighbors or NEIGHBOR_LIST_SIZE)
+
+    log("Step 2: Optimizing with 2-Opt (Local Search)...")
+    with phase(stats, 'two_opt'):
+        if neighbors:
+            solution = solve_2opt_neighbors(cities, initial_solution, candidates,
+                                            new_best_solution_func, stats=stats)
+        else:
+            solution = solve_2opt(cities, initial_solution, new_best_solution_func, stats)
+
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+    def remaining():
+        return None if deadline is None else max(0.0, deadline - time.perf_counter())
+
+    log("Step 3: Relocating Segments with Or-Opt...")
+    with phase(stats, 'or_opt'):
+        solution = solve_or_opt(cities, solution, candidates, new_best_solution_func,
+                                remaining(), stats)
+
+    log("Step 4: Optimizing with Lin-Kernighan (k-Opt)...")
+    with phase(stats, 'lin_kernighan'):
+        final_solution = solve_lin_kernighan(cities, solution, candidates,
+                                             new_best_solution_func, remaining(), stats=stats)
+
     return final_solution
 
 
-if __name__ == '__main__':
-    
-    cities = read_cities(filename)
+def _restart_worker(worker_id, seed, time_limit, max_restarts):
+    '''
+    Run randomized restarts (nearest neighbour from a random start city, then
+    2-Opt, Or-Opt and Lin-Kernighan) until the time budget or restart count is
+    used up. Always completes at least one restart.
+    '''
+    cities = shared_arrays['cities']
+    neighbors = shared_arrays['neighbors']
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+    deadline = started + time_limit
+
+    def remaining():
+        return max(0.0, deadline - time.perf_counter())
 
-    show_progress = True 
+    best_solution, best_dist = None, float('inf')
+    restarts = 0
 
-    if not show_progress:
-        solution = tsp_solver_smart(cities)
-        visualize_solution(cities, solution)
+    while restarts == 0 or (remaining() > 0 and
+                            (max_restarts is None or restarts < max_restarts)):
+        solution = solve_nearest_neighbor(cities, int(rng.integers(len(cities))))
+        solution = solve_2opt_neighbors(cities, solution, neighbors, time_limit=remaining())
+        solution = solve_or_opt(cities, solution, neighbors, time_limit=remaining())
+        solution = solve_lin_kernighan(cities, solution, neighbors, time_limit=remaining())
+        restarts += 1
+
+        dist = score_solution(cities, solution)
+        if dist < best_dist:
+            best_solution, best_dist = solution, dist
+
+    stats = {
+        'worker': worker_id,
+        'restarts': restarts,
+        'best_distance': float(best_dist),
+        'elapsed': time.perf_counter() - started,
+    }
+    return best_solution, stats
+
+
+def tsp_solver_parallel(cities, workers=None, time_limit=10.0, max_restarts=None,
+                        neighbors=NEIGHBOR_LIST_SIZE, seed=None):
+    '''
+    Randomized restarts spread over a pool of `workers` processes (default:
+    one per CPU), each running for about `time_limit` seconds of wall clock.
+    The cities and neighbour lists are placed in shared memory once instead
+    of being pickled per task.
+    Returns the best solution and a list of per-worker stats dicts.
+    '''
+    workers = workers or os.cpu_count() or 1
+    cities = np.ascontiguousarray(cities, dtype=float)
+    candidates = np.ascontiguousarray(build_neighbor_lists(cities, neighbors))
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+
+    blocks = []
+    try:
+        specs = {}
+        for key, array in (('cities', cities), ('neighbors', candidates)):
+            shm, specs[key] = share_array(array)
+            blocks.append(shm)
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=attach_shared_arrays,
+                                 initargs=(specs,)) as pool:
+            futures = [pool.submit(_restart_worker, i, seeds[i], time_limit, max_restarts)
+                       for i in range(workers)]
+            results = [future.result() for future in futures]
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    stats = [worker_stats for _, worker_stats in results]
+    best_solution, _ = min(results, key=lambda result: result[1]['best_distance'])
+    return best_solution, stats
+
+
+def write_tour(solution, path=None):
+    '''
+    Write the tour one city index per line to `path`, or to stdout if `path`
+    is None or '-'.
+    '''
+    lines = '\n'.join(map(str, np.asarray(solution).tolist())) + '\n'
+    if path is None or path == '-':
+        sys.stdout.write(lines)
+    else:
+        with open(path, 'w') as f:
+            f.write(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a TSP dataset of x,y city rows.")
+    parser.add_argument('file', nargs='?', default='small.csv',
+                        help="city CSV (default: small.csv)")
+    parser.add_argument('--construction', choices=CONSTRUCTIONS, default='nearest_neighbor',
+                        help="stage 1 tour constructor")
+    parser.add_argument('--matching', choices=CHRISTOFIDES_MATCHINGS,
+                        default=SMART_CHRISTOFIDES_MATCHING,
+                        help="Christofides odd-city matching; only 'exact' keeps the 1.5x "
+                             "bound, but it is slow beyond a few hundred cities")
+    parser.add_argument('--neighbors', type=int, default=None,
+                        help="use neighbour-list 2-Opt with this many candidates per city")
+    parser.add_argument('--time-limit', type=float, default=None,
+                        help="seconds shared by Or-Opt and Lin-Kernighan (restarts: total)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="run randomized restarts on this many processes")
+    parser.add_argument('--no-plot', action='store_true',
+                        help="headless: never import matplotlib or open a window")
+    parser.add_argument('--output', '-o', default=None,
+                        help="write the tour here ('-' for stdout); --no-plot defaults to stdout")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="do not read or write the .npy cache")
+    parser.add_argument('--quiet', '-q', action='store_true', help="no progress messages")
+    parser.add_argument('--stats', action='store_true',
+                        help="print phase timings and operation counters at the end")
+    args = parser.parse_args(argv)
+    if args.workers and args.construction != 'nearest_neighbor':
+        parser.error("--workers only supports --construction nearest_neighbor")
+
+    # Progress goes to stderr so a tour written to stdout stays clean
+    def log(message):
+        if not args.quiet:
+            print(message, file=sys.stderr)
+
+    try:
+        cities = read_cities(args.file, cache=not args.no_cache)
+    except FileNotFoundError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    stats = SolverStats(log=log)
+    options = dict(neighbors=args.neighbors, time_limit=args.time_limit, workers=args.workers,
+                   stats=stats, construction=args.construction, matching=args.matching)
+
+    if args.no_plot:
+        solution = tsp_solver_smart(cities, **options)
     else:
         fig, axes = create_figure()
 
         def visualize_wrapper(solution, is_final=False):
             dist = score_solution(cities, solution)
-            print(f"{'FINAL' if is_final else 'Current'} Distance: {dist:.4f}")
+            log(f"{'FINAL' if is_final else 'Current'} Distance: {dist:.4f}")
             visualize_solution(cities, solution, fig, axes, block=is_final)
 
-        solution = tsp_solver_smart(cities, visualize_wrapper)
-        visualize_wrapper(solution, True)
\ No newline at end of file
+        solution = tsp_solver_smart(cities, visualize_wrapper, **options)
+
+    if args.no_plot:
+        log(f"Final Distance: {score_solution(cities, solution):.4f}")
+    if args.stats:
+        print(stats.summary(), file=sys.stderr)
+    if args.output is not None or args.no_plot:
+        write_tour(solution, args.output)
+    if not args.no_plot:
+        visualize_wrapper(solution, True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
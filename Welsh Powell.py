@@ -4,6 +4,25 @@ import networkx as nx
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import random
+import queue
+import threading
+
+from welsh_powell import color_graph, COLORING_METHODS
+
+# Graphs larger than this are drawn without labels and with smaller nodes
+LABEL_LIMIT = 60
+
+# Largest graph the Nodes box allows; spring_layout alone takes a few
+# seconds (on the worker thread) at this size and grows quadratically
+MAX_NODES = 1000
+
+# Chosen node counts keep about this many neighbours per node on average,
+# instead of a fixed 30-60% edge probability that grows as n^2
+MAX_AVG_DEGREE = 10
+
+# Graphs with more edges than this are drawn as nodes only, since edges
+# are drawn on the Tk thread
+EDGE_DRAW_LIMIT = 2000
 
 class GraphColoringApp:
     def __init__(self, root):
@@ -20,6 +39,13 @@ class GraphColoringApp:
         self.main_pane.add(self.left_frame, stretch="always")
         self.main_pane.add(self.right_frame)
 
+        # Results from the worker thread, picked up on the Tk main thread
+        self.results = queue.Queue()
+        self.generation = 0
+        self.G = None
+        self.layout = None
+        self.node_collection = None
+
         self.setup_controls()
         self.setup_table()
 
@@ -45,6 +71,22 @@ class GraphColoringApp:
         )
         self.btn_random.pack(pady=10)
 
+        size_frame = tk.Frame(control_frame)
+        size_frame.pack(pady=5)
+        tk.Label(size_frame, text="Nodes (0 = random 5-12):", font=("Arial", 10)).pack(side=tk.LEFT)
+        self.var_nodes = tk.IntVar(value=0)
+        tk.Spinbox(size_frame, from_=0, to=MAX_NODES, increment=10, width=7,
+                   textvariable=self.var_nodes).pack(side=tk.LEFT, padx=5)
+
+        method_frame = tk.Frame(control_frame)
+        method_frame.pack(pady=5)
+        tk.Label(method_frame, text="Method:", font=("Arial", 10)).pack(side=tk.LEFT)
+        self.var_method = tk.StringVar(value=COLORING_METHODS[0])
+        self.cmb_method = ttk.Combobox(method_frame, textvariable=self.var_method,
+                                       values=COLORING_METHODS, state="readonly", width=16)
+        self.cmb_method.pack(side=tk.LEFT, padx=5)
+        self.cmb_method.bind("<<ComboboxSelected>>", lambda event: self.recolor())
+
         self.lbl_stats = tk.Label(control_frame, text="", font=("Arial", 10))
         self.lbl_stats.pack(pady=5)
 
@@ -84,78 +126,120 @@ class GraphColoringApp:
         self.canvas = FigureCanvasTkAgg(self.figure, self.left_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
-    def welsh_powell(self, graph, nodes):
-        """
-        Runs the Welsh-Powell algorithm.
-        Returns a dict: {node: color_index}
-        """
-        sorted_nodes = sorted(nodes, key=lambda x: graph.degree[x], reverse=True)
-        
-        colors = {node: None for node in sorted_nodes}
-        current_color = 0
-
-        for i in range(len(sorted_nodes)):
-            node = sorted_nodes[i]
-            if colors[node] is not None:
-                continue
-
-            colors[node] = current_color
-
-            for j in range(i + 1, len(sorted_nodes)):
-                next_node = sorted_nodes[j]
-                if colors[next_node] is None:
-                    is_connected = False
-                    for existing, col in colors.items():
-                        if col == current_color and graph.has_edge(existing, next_node):
-                            is_connected = True
-                            break
-                    
-                    if not is_connected:
-                        colors[next_node] = current_color
-            
-            current_color += 1
-        return colors
-
     def generate_and_draw(self):
-        """Generates a random graph, updates the table, and redraws the plot."""
-        num_nodes = random.randint(5, 12)  
-        prob = random.uniform(0.3, 0.6)    
-        
-        self.G = nx.gnp_random_graph(num_nodes, prob, seed=None)
-        
-        mapping = {i: i+1 for i in range(num_nodes)}
-        self.G = nx.relabel_nodes(self.G, mapping)
-
-        coloring = self.welsh_powell(self.G, self.G.nodes())
-        chromatic_num = max(coloring.values()) + 1 if coloring else 0
-
+        """Generates a random graph and colors it on a worker thread."""
+        try:
+            num_nodes = self.var_nodes.get()
+        except tk.TclError:
+            num_nodes = 0
+        if num_nodes <= 0:
+            num_nodes = random.randint(5, 12)
+        num_nodes = min(num_nodes, MAX_NODES)
+        prob = min(random.uniform(0.3, 0.6), MAX_AVG_DEGREE / max(num_nodes - 1, 1))
+        method = self.var_method.get()
+
+        self.generation += 1
+        generation = self.generation
+        self.set_busy(True)
+
+        def work():
+            G = nx.fast_gnp_random_graph(num_nodes, prob, seed=None)
+            mapping = {i: i+1 for i in range(num_nodes)}
+            G = nx.relabel_nodes(G, mapping)
+
+            layout = nx.spring_layout(G, seed=42)
+            coloring, stats = color_graph(G, G.nodes(), method=method)
+            return G, layout, coloring, stats
+
+        self.run_in_background(generation, work, self.show_graph)
+
+    def recolor(self):
+        """Colors the current graph again with the selected method, reusing its layout."""
+        if self.G is None:
+            return
+        G, method = self.G, self.var_method.get()
+        generation = self.generation
+        self.set_busy(True)
+
+        def work():
+            return color_graph(G, G.nodes(), method=method)
+
+        self.run_in_background(generation, work, self.show_coloring)
+
+    def run_in_background(self, generation, work, on_done):
+        """Runs `work` on a worker thread and hands its result to `on_done` on the Tk thread."""
+        def target():
+            try:
+                self.results.put((generation, on_done, work(), None))
+            except Exception as e:
+                self.results.put((generation, on_done, None, e))
+
+        threading.Thread(target=target, daemon=True).start()
+        self.root.after(50, self.poll_results)
+
+    def poll_results(self):
+        try:
+            generation, on_done, result, error = self.results.get_nowait()
+        except queue.Empty:
+            self.root.after(50, self.poll_results)
+            return
+
+        # Results for a graph that has since been replaced are dropped
+        if generation == self.generation:
+            self.set_busy(False)
+            if error is not None:
+                self.lbl_stats.config(text=f"Error: {error}")
+            else:
+                on_done(*result)
+
+    def set_busy(self, busy):
+        state = tk.DISABLED if busy else tk.NORMAL
+        self.btn_random.config(state=state)
+        self.cmb_method.config(state=tk.DISABLED if busy else "readonly")
+        if busy:
+            self.lbl_stats.config(text="Working...")
+
+    def node_colors(self, coloring):
+        palette = ['#FF9999', '#66B2FF', '#99FF99', '#FFCC99', '#D187FF', '#FFFF99', '#CCCCCC']
+        return [palette[coloring[n] % len(palette)] for n in self.G.nodes()]
 
+    def update_table(self, coloring, stats):
         for item in self.tree.get_children():
             self.tree.delete(item)
-        
+
         sorted_nodes = sorted(self.G.nodes(), key=lambda x: self.G.degree[x], reverse=True)
         for node in sorted_nodes:
             self.tree.insert("", "end", values=(node, self.G.degree[node], coloring[node]))
 
-        self.lbl_stats.config(text=f"Nodes: {num_nodes} | Edges: {self.G.number_of_edges()}\nChromatic Number: {chromatic_num}")
+        self.lbl_stats.config(text=f"Nodes: {self.G.number_of_nodes()} | Edges: {self.G.number_of_edges()}\n"
+                                   f"Colors Used: {stats['colors']} | Time: {stats['runtime'] * 1000:.1f} ms")
+        self.ax.set_title(f"{stats['method']} Coloring (Colors Used: {stats['colors']})")
+
+    def show_graph(self, G, layout, coloring, stats):
+        """Draws a newly generated graph."""
+        self.G, self.layout = G, layout
 
         self.ax.clear()
-        
-        palette = ['#FF9999', '#66B2FF', '#99FF99', '#FFCC99', '#D187FF', '#FFFF99', '#CCCCCC']
-        node_colors = [palette[coloring[n] % len(palette)] for n in self.G.nodes()]
-        
-        pos = nx.spring_layout(self.G, seed=42)
-        nx.draw(
-            self.G, pos, ax=self.ax,
-            node_color=node_colors, 
-            with_labels=True, 
-            node_size=800, 
-            font_weight='bold',
-            edge_color='#555555'
+        small = G.number_of_nodes() <= LABEL_LIMIT
+        if G.number_of_edges() <= EDGE_DRAW_LIMIT:
+            nx.draw_networkx_edges(G, layout, ax=self.ax, edge_color='#555555')
+        self.node_collection = nx.draw_networkx_nodes(
+            G, layout, ax=self.ax,
+            node_color=self.node_colors(coloring),
+            node_size=800 if small else 30
         )
-        self.ax.set_title(f"Welsh-Powell Coloring (Colors Used: {chromatic_num})")
-        
-        self.canvas.draw()
+        if small:
+            nx.draw_networkx_labels(G, layout, ax=self.ax, font_weight='bold')
+        self.ax.set_axis_off()
+
+        self.update_table(coloring, stats)
+        self.canvas.draw_idle()
+
+    def show_coloring(self, coloring, stats):
+        """Updates node colors in place on the cached layout."""
+        self.node_collection.set_facecolor(self.node_colors(coloring))
+        self.update_table(coloring, stats)
+        self.canvas.draw_idle()
 
 if __name__ == "__main__":
     root = tk.Tk()
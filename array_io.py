@@ -0,0 +1,67 @@
+"""
+Array plumbing shared by the scripts in this repository.
+
+`read_csv_chunks` parses a numeric CSV a fixed number of rows at a time, so
+files larger than memory can be streamed and large ones never need a full
+list of parsed lines.
+
+`share_array` copies an array into a shared memory block once, and
+`attach_shared_arrays` (a process pool initializer) maps those blocks in
+each worker, so pooled work reads big inputs without pickling them per task:
+
+    shm, spec = share_array(cities)
+    with ProcessPoolExecutor(initializer=attach_shared_arrays,
+                             initargs=({'cities': spec},)) as pool:
+        ...  # tasks read shared_arrays['cities']
+    shm.close()
+    shm.unlink()
+"""
+import warnings
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def read_csv_chunks(path, chunk_rows):
+    """
+    Yields the rows of a comma separated numeric file as 2-D float arrays of
+    at most `chunk_rows` rows each.
+    """
+    with open(path) as f, warnings.catch_warnings():
+        # loadtxt warns when it reaches the end of the file with no rows left
+        warnings.simplefilter('ignore', UserWarning)
+        while True:
+            chunk = np.loadtxt(f, delimiter=',', max_rows=chunk_rows, ndmin=2)
+            if len(chunk):
+                yield chunk
+            if len(chunk) < chunk_rows:
+                break
+
+
+# Arrays attached from shared memory in this worker process, by key
+shared_arrays = {}
+
+# The blocks behind `shared_arrays`, kept open as long as the arrays are used
+_attached_blocks = {}
+
+
+def share_array(array):
+    """
+    Copy `array` into a new shared memory block; returns the block and the
+    (name, shape, dtype) needed to attach to it from another process. The
+    caller closes and unlinks the block when the workers are done.
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def attach_shared_arrays(specs):
+    """
+    Process pool initializer: maps every {key: spec} made by `share_array`
+    into `shared_arrays`.
+    """
+    for key, (name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=name)
+        _attached_blocks[key] = shm
+        shared_arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
@@ -0,0 +1,301 @@
+"""
+Reproducible benchmarks for every algorithm in this repository.
+
+Each case builds a seeded synthetic input, times the algorithm, measures its
+peak traced memory in a separate run (tracemalloc slows Python code down, so
+it is kept out of the timing) and records a quality figure such as the MST
+weight, assignment cost, tour length or number of colors. Results are
+written as JSON so two versions can be compared:
+
+    python benchmark.py --scale small --output before.json
+    python benchmark.py --scale small --output after.json --compare before.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'TSP'))
+
+import CPP
+import kruskal
+import prims_trial2
+import hungarian
+import welsh_powell
+import tsp_starter
+
+
+SCALES = {
+    'small': dict(grid=20, geometric=500, gnp=300, gnp_degree=8, matrix=200, cities=200),
+    'medium': dict(grid=60, geometric=5000, gnp=3000, gnp_degree=10, matrix=1000, cities=1000),
+    'large': dict(grid=150, geometric=50000, gnp=20000, gnp_degree=12, matrix=3000, cities=3000),
+}
+
+
+# ---- Seeded generators ----
+
+def grid_graph(side, seed):
+    '''
+    Road-like side x side grid with integer weights 1..10, as a dict graph.
+    '''
+    rng = np.random.default_rng(seed)
+    graph = {i: [] for i in range(side * side)}
+    for r in range(side):
+        for c in range(side):
+            node = r * side + c
+            for other in ((node + 1) if c + 1 < side else None, (node + side) if r + 1 < side else None):
+                if other is not None:
+                    weight = int(rng.integers(1, 11))
+                    graph[node].append((other, weight))
+                    graph[other].append((node, weight))
+    return graph
+
+
+def geometric_graph(n, seed, degree=8):
+    '''
+    Random geometric graph on n points in the unit square, with a radius
+    giving about `degree` neighbours per point and Euclidean weights.
+    A path through all points keeps it connected.
+    '''
+    from scipy.spatial import cKDTree
+    rng = np.random.default_rng(seed)
+    points = rng.random((n, 2))
+    radius = np.sqrt(degree / (np.pi * n))
+    pairs = cKDTree(points).query_pairs(radius, output_type='ndarray')
+    chain = np.column_stack([np.arange(n - 1), np.arange(1, n)])
+    pairs = np.unique(np.sort(np.vstack([pairs, chain]), axis=1), axis=0)
+
+    graph = {i: [] for i in range(n)}
+    weights = np.linalg.norm(points[pairs[:, 0]] - points[pairs[:, 1]], axis=1)
+    for (u, v), weight in zip(pairs.tolist(), weights.tolist()):
+        graph[u].append((v, weight))
+        graph[v].append((u, weight))
+    return graph
+
+
+def gnp_graph(n, seed, degree=8):
+    '''
+    Erdos-Renyi G(n, p) with p chosen for an expected `degree`, as a dict.
+    '''
+    rng = np.random.default_rng(seed)
+    m = rng.binomial(n * (n - 1) // 2, degree / max(n - 1, 1))
+    u = rng.integers(0, n, m)
+    v = rng.integers(0, n, m)
+    keep = u != v
+    pairs = np.unique(np.sort(np.column_stack([u[keep], v[keep]]), axis=1), axis=0)
+    graph = {i: [] for i in range(n)}
+    for a, b in pairs.tolist():
+        graph[a].append(b)
+        graph[b].append(a)
+    return graph
+
+
+def cost_matrix(n, seed):
+    return np.random.default_rng(seed).integers(0, 1000, (n, n)).astype(float)
+
+
+def city_cloud(n, seed):
+    '''
+    Clustered 2D cities spread like TSP/small.csv (roughly -15..15).
+    '''
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(-12, 12, (max(1, n // 50), 2))
+    return centers[rng.integers(0, len(centers), n)] + rng.normal(0, 2, (n, 2))
+
+
+# ---- Cases ----
+
+def _odd_matching_input(graph):
+    odd = CPP.odd_degree_nodes(graph)
+    return odd, CPP.odd_distance_matrix(graph, odd)
+
+
+def build_cases(scale, seed):
+    '''
+    Returns a list of (name, params, setup, run, quality). `setup` builds the
+    input (not timed), `run` takes it and returns the result, and `quality`
+    turns the result into a dict of figures to record.
+    '''
+    size = SCALES[scale]
+    cases = []
+
+    def add(name, params, setup, run, quality):
+        cases.append((name, params, setup, run, quality))
+
+    add('dijkstra', {'grid': size['grid']},
+        lambda: grid_graph(size['grid'], seed),
+        lambda g: CPP.dijkstra(g, 0),
+        lambda dist: {'max_distance': max(dist.values())})
+
+    # the default exact matching, whose cost must never change; it is O(n^3)
+    # in pure Python (~100 s for the ~600 odd nodes of the large grid), so
+    # the large scale only times the candidate-restricted heuristic below
+    if scale != 'large':
+        add('min_weight_matching', {'grid': size['grid']},
+            lambda: _odd_matching_input(grid_graph(size['grid'], seed)),
+            lambda data: CPP.min_weight_matching(data[0], data[1]),
+            lambda result: {'matching_cost': result[0], 'pairs': len(result[1])})
+
+    # blossom over each node's 10 nearest odd nodes only: no optimality
+    # guarantee, so its cost may move without a regression
+    add('matching_candidates', {'grid': size['grid'], 'candidates': 10},
+        lambda: _odd_matching_input(grid_graph(size['grid'], seed)),
+        lambda data: CPP.min_weight_matching(data[0], data[1], candidates=10),
+        lambda result: {'matching_cost': result[0], 'pairs': len(result[1])})
+
+    add('kruskals', {'geometric': size['geometric']},
+        lambda: geometric_graph(size['geometric'], seed),
+        kruskal.kruskals_fast,
+        lambda result: {'mst_weight': round(result[1], 9), 'mst_edges': len(result[0])})
+
+    add('prims', {'geometric': size['geometric']},
+        lambda: geometric_graph(size['geometric'], seed),
+        lambda g: prims_trial2.prims(g, 0),
+        lambda result: {'mst_weight': round(result[1], 9), 'mst_edges': len(result[0])})
+
+    add('hungarian', {'matrix': size['matrix']},
+        lambda: cost_matrix(size['matrix'], seed),
+        hungarian.hungarian,
+        lambda result: {'assignment_cost': result[1]})
+
+    add('welsh_powell', {'gnp': size['gnp'], 'degree': size['gnp_degree']},
+        lambda: gnp_graph(size['gnp'], seed, size['gnp_degree']),
+        lambda g: (g, welsh_powell.welsh_powell(g)),
+        lambda result: {'colors_used': max(result[1].values()) + 1,
+                        'valid': all(result[1][u] != result[1][v]
+                                     for u in result[0] for v in result[0][u])})
+
+    add('solve_nearest_neighbor', {'cities': size['cities']},
+        lambda: city_cloud(size['cities'], seed),
+        lambda cities: (cities, tsp_starter.solve_nearest_neighbor(cities)),
+        lambda result: {'tour_length': round(tsp_starter.score_solution(*result), 9)})
+
+    # exact blossom matching is O(n^3) in pure Python, so beyond the small
+    # scale the greedy matching is timed instead
+    matching = 'exact' if scale == 'small' else 'greedy'
+    add('solve_christofides', {'cities': size['cities'], 'matching': matching},
+        lambda: city_cloud(size['cities'], seed),
+        lambda cities: (cities, tsp_starter.solve_christofides(cities, matching)),
+        lambda result: {'tour_length': round(tsp_starter.score_solution(*result), 9)})
+
+    add('solve_2opt', {'cities': size['cities']},
+        lambda: (lambda cities: (cities, tsp_starter.solve_nearest_neighbor(cities)))(
+            city_cloud(size['cities'], seed)),
+        lambda data: (data[0], tsp_starter.solve_2opt(*data)),
+        lambda result: {'tour_length': round(tsp_starter.score_solution(*result), 9)})
+
+    return cases
+
+
+def run_case(case, repeats=1, measure_memory=True):
+    name, params, setup, run, quality = case
+    data = setup()
+
+    timings = []
+    for _ in range(repeats):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            result = run(data)
+            timings.append(time.perf_counter() - started)
+
+    peak_mb = None
+    if measure_memory:
+        tracemalloc.start()
+        with contextlib.redirect_stdout(io.StringIO()):
+            run(data)
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+
+    return {
+        'name': name,
+        'params': params,
+        'seconds': min(timings),
+        'peak_mb': peak_mb,
+        'quality': {key: _plain(value) for key, value in quality(result).items()},
+    }
+
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline):
+    '''
+    Prints time and memory ratios against a previous results file, and any
+    quality figure that changed.
+    '''
+    previous = {entry['name']: entry for entry in baseline['results']}
+    print(f"\n{'case':<24}{'time':>10}{'ratio':>8}{'memory':>10}{'ratio':>8}  quality")
+    for entry in results:
+        old = previous.get(entry['name'])
+        if old is None or old['params'] != entry['params']:
+            print(f"{entry['name']:<24}  (no comparable baseline)")
+            continue
+        time_ratio = entry['seconds'] / old['seconds'] if old['seconds'] else float('nan')
+        mem_ratio = (entry['peak_mb'] / old['peak_mb']
+                     if entry['peak_mb'] is not None and old.get('peak_mb') else float('nan'))
+        changed = {key: (old['quality'].get(key), value) for key, value in entry['quality'].items()
+                   if old['quality'].get(key) != value}
+        print(f"{entry['name']:<24}{entry['seconds']:>9.3f}s{time_ratio:>8.2f}"
+              f"{entry['peak_mb'] or 0:>8.1f}MB{mem_ratio:>8.2f}  {changed or 'same'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeats', type=int, default=1, help='timed runs per case (best is kept)')
+    parser.add_argument('--only', nargs='*', help='run only these cases')
+    parser.add_argument('--no-memory', action='store_true', help='skip the peak memory run')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help='previous results file to compare against')
+    args = parser.parse_args(argv)
+
+    results = []
+    for case in build_cases(args.scale, args.seed):
+        if args.only and case[0] not in args.only:
+            continue
+        entry = run_case(case, args.repeats, not args.no_memory)
+        results.append(entry)
+        memory = f"{entry['peak_mb']:.1f}MB" if entry['peak_mb'] is not None else '-'
+        print(f"{entry['name']:<24}{entry['seconds']:>9.3f}s {memory:>9}  {entry['quality']}")
+
+    report = {
+        'meta': {
+            'scale': args.scale,
+            'seed': args.seed,
+            'repeats': args.repeats,
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Compact graph storage shared by the scripts in this repository.
+
+`CSRGraph` relabels the vertices to 0..V-1 and keeps the adjacency in three
+flat NumPy arrays (CSR layout): `offsets[i]:offsets[i + 1]` is the slice of
+`neighbors` and `weights` belonging to vertex i. An undirected edge is
+stored once in each direction, which costs a few bytes per edge instead of
+the ~100+ bytes of a tuple inside a dict-of-lists.
+
+It also behaves like the dict-of-lists graphs used elsewhere in the repo
+(`for node in graph`, `graph[node]` -> [(neighbor, weight), ...]), so the
+existing functions accept it unchanged; `dijkstra`, `prims`,
+`kruskals_fast`, `edge_arrays` and `welsh_powell` additionally read the
+arrays directly.
+"""
+import numpy as np
+
+
+class CSRGraph:
+    def __init__(self, nodes, offsets, neighbors, weights):
+        self.nodes = list(nodes)
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.weights = weights
+
+    @classmethod
+    def from_dict(cls, graph):
+        """
+        From {node: [(neighbor, weight), ...]}; bare neighbours get weight 1.
+        """
+        nodes = list(graph)
+        index = {node: i for i, node in enumerate(nodes)}
+        counts = np.zeros(len(nodes) + 1, dtype=np.int64)
+        neighbors, weights = [], []
+        for i, node in enumerate(nodes):
+            for entry in graph[node]:
+                neighbor, weight = entry if isinstance(entry, tuple) else (entry, 1)
+                neighbors.append(index[neighbor])
+                weights.append(weight)
+            counts[i + 1] = len(graph[node])
+
+        return cls(nodes, np.cumsum(counts), _index_array(neighbors, len(nodes)),
+                   np.asarray(weights) if weights else np.zeros(0))
+
+    @classmethod
+    def from_edges(cls, edges, nodes=None):
+        """
+        From an iterable of undirected (u, v) or (u, v, weight) edges.
+        Vertices are labelled in order of first appearance unless `nodes`
+        gives the full list.
+        """
+        index = {} if nodes is None else {node: i for i, node in enumerate(nodes)}
+        src, dst, weights = [], [], []
+        for edge in edges:
+            u, v = edge[0], edge[1]
+            for node in (u, v):
+                if node not in index:
+                    index[node] = len(index)
+            src.append(index[u])
+            dst.append(index[v])
+            weights.append(edge[2] if len(edge) > 2 else 1)
+
+        nodes = list(index) if nodes is None else list(nodes)
+        return cls.from_arrays(len(nodes), np.array(src, dtype=np.int64),
+                               np.array(dst, dtype=np.int64),
+                               np.asarray(weights) if weights else np.zeros(0), nodes)
+
+    @classmethod
+    def from_arrays(cls, num_nodes, src, dst, weights, nodes=None):
+        """
+        From parallel arrays of undirected edges over vertices 0..num_nodes-1.
+        """
+        loops = src == dst
+        both_src = np.concatenate([src, dst[~loops]])
+        both_dst = np.concatenate([dst, src[~loops]])
+        both_weights = np.concatenate([weights, weights[~loops]])
+
+        order = np.argsort(both_src, kind='stable')
+        counts = np.bincount(both_src, minlength=num_nodes)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        return cls(range(num_nodes) if nodes is None else nodes, offsets,
+                   _index_array(both_dst[order], num_nodes), both_weights[order])
+
+    @classmethod
+    def from_networkx(cls, G, weight='weight'):
+        """
+        From a networkx graph; edges without `weight` get weight 1.
+        """
+        return cls.from_edges(G.edges(data=weight, default=1), nodes=list(G))
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __contains__(self, node):
+        return node in self.index
+
+    def __getitem__(self, node):
+        i = self.index[node]
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return [(self.nodes[j], w) for j, w in
+                zip(self.neighbors[start:end].tolist(), self.weights[start:end].tolist())]
+
+    @property
+    def num_edges(self):
+        return int((len(self.neighbors) + self.self_loops()) // 2)
+
+    def self_loops(self):
+        src = np.repeat(np.arange(len(self.nodes)), np.diff(self.offsets))
+        return int((src == self.neighbors).sum())
+
+    def degrees(self):
+        return np.diff(self.offsets)
+
+    def edge_arrays(self):
+        """
+        (src, dst, weights) with every undirected edge once (src <= dst).
+        """
+        src = np.repeat(np.arange(len(self.nodes), dtype=self.neighbors.dtype),
+                        np.diff(self.offsets))
+        once = src <= self.neighbors
+        return src[once], self.neighbors[once], self.weights[once]
+
+    def adjacency_lists(self):
+        """
+        Plain-list copies of (offsets, neighbors, weights) for Python loops.
+        They take several times the memory of the arrays, so they are built
+        on every call and never kept on the graph; hold on to them only for
+        the duration of a search.
+        """
+        return self.offsets.tolist(), self.neighbors.tolist(), self.weights.tolist()
+
+
+def _index_array(values, num_nodes):
+    dtype = np.int32 if num_nodes < 2**31 else np.int64
+    return np.asarray(values, dtype=dtype)
@@ -1,53 +1,389 @@
-def hungarian(cost_matrix):
-    import copy
-    matrix = copy.deepcopy(cost_matrix)
-    size = len(matrix)
-
-    # Row Reduction
-    for row in range(size):
-        min_value = min(matrix[row])
-        for col in range(size):
-            matrix[row][col] -= min_value
-
-    # Column Reduction
-    for col in range(size):
-        min_value = min(matrix[row][col] for row in range(size))
-        for row in range(size):
-            matrix[row][col] -= min_value
-
-    # Greedy Star Zeroes
-    starred = [[False] * size for _ in range(size)]
-    covered_rows = [False] * size
-    covered_columns = [False] * size
-
-    for row in range(size):
-        for col in range(size):
-            if (
-                matrix[row][col] == 0
-                and not covered_rows[row]
-                and not covered_columns[col]
-            ):
-                starred[row][col] = True
-                covered_rows[row] = True
-                covered_columns[col] = True
-
-    # Extract Assignment
-    assignment = []
-    for row in range(size):
-        if True in starred[row]:
-            col = starred[row].index(True)
-        else:
-            col = matrix[row].index(min(matrix[row]))
-        assignment.append((row, col))
-
-    return assignment
-
-
-if __name__ == '__main__':
-    costs = [
-        [4, 1, 3],
-        [2, 0, 5],
-        [3, 2, 2]
-    ]
-
-    print(hungarian(costs))
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from solver_stats import phase
+
+
+def hungarian(cost_matrix, stats=None):
+    """
+    Solves the assignment problem with the O(n^3) shortest augmenting path
+    form of the Hungarian (Kuhn-Munkres / Jonker-Volgenant) algorithm.
+    A reduction step matches part of the rows up front; every other row is
+    then matched by a Dijkstra search over reduced costs, with one vectorized
+    pass over the columns per step, and the row/column potentials are
+    updated afterwards so the reduced costs stay non-negative.
+
+    `cost_matrix` may be rectangular, in which case every row (or every
+    column, if there are fewer) is assigned, and entries of inf are
+    forbidden. A dict {(row, col): cost} or a scipy.sparse matrix is solved
+    as a sparse problem in which only the listed entries are allowed.
+    Returns (assignment, total_cost), with assignment a list of (row, col).
+    Raises ValueError if no complete assignment exists.
+
+    With a SolverStats as `stats`, the reduction and augmentation phases are
+    timed and the augmenting paths and their lengths are counted.
+    """
+    if isinstance(cost_matrix, dict) or hasattr(cost_matrix, 'tocoo'):
+        return hungarian_sparse(cost_matrix, stats=stats)
+
+    matrix = np.asarray(cost_matrix, dtype=float)
+    if matrix.ndim != 2:
+        raise ValueError("Cost matrix must be 2-dimensional, got shape {}".format(matrix.shape))
+    if matrix.shape[0] > matrix.shape[1]:
+        assignment, total_cost = hungarian(matrix.T, stats)
+        return sorted((row, col) for col, row in assignment), total_cost
+    if matrix.size == 0:
+        return [], 0
+
+    rows = len(matrix)
+    _, _, _, col_of = _solve_dense(matrix, stats)
+    assignment = [(row, int(col)) for row, col in enumerate(col_of)]
+    total_cost = matrix[np.arange(rows), col_of].sum()
+    return assignment, total_cost.item()
+
+
+def _solve_dense(matrix, stats=None):
+    """
+    Core of `hungarian` for a dense matrix with rows <= cols.
+    Returns the final (row_pot, col_pot, row_of, col_of).
+    """
+    with phase(stats, 'reduction'):
+        row_pot, col_pot, row_of, col_of, free_rows = _reduce(matrix)
+    if stats is not None:
+        stats.count('rows_matched_by_reduction', len(matrix) - len(free_rows))
+
+    with phase(stats, 'augmentation'):
+        for row in free_rows:
+            steps = _augment(matrix, row, row_pot, col_pot, row_of, col_of)
+            if stats is not None:
+                stats.count('augmentations')
+                stats.count('augmenting_path_rows', steps)
+
+    return row_pot, col_pot, row_of, col_of
+
+
+def _reduce(matrix):
+    """
+    Column and row reduction for `_solve_dense`: initial potentials and a
+    partial matching. Returns (row_pot, col_pot, row_of, col_of, free_rows).
+    """
+    rows, cols = matrix.shape
+    row_pot = np.zeros(rows)
+    col_of = np.full(rows, -1)
+    row_of = np.full(cols, -1)
+
+    if rows == cols:
+        # Column Reduction: column minima are a valid dual, and each column's
+        # minimum row can take it if that row is still free
+        col_pot = matrix.min(axis=0)
+        for col, row in enumerate(matrix.argmin(axis=0)):
+            if col_of[row] == -1 and col_pot[col] != np.inf:
+                col_of[row] = col
+                row_of[col] = row
+    else:
+        # With spare columns every unmatched column must keep a zero
+        # potential, so only the rows are reduced
+        col_pot = np.zeros(cols)
+    if np.isinf(col_pot).any():
+        raise ValueError("Cost matrix is infeasible")
+
+    # Row Reduction for the rows left over
+    free_rows = np.flatnonzero(col_of == -1)
+    row_pot[free_rows] = (matrix[free_rows] - col_pot).min(axis=1)
+    if np.isinf(row_pot).any():
+        raise ValueError("Cost matrix is infeasible")
+    if rows != cols:
+        for row, col in zip(free_rows, matrix[free_rows].argmin(axis=1)):
+            if row_of[col] == -1:
+                col_of[row] = col
+                row_of[col] = row
+        free_rows = np.flatnonzero(col_of == -1)
+
+    return row_pot, col_pot, row_of, col_of, free_rows
+
+
+class HungarianSolver:
+    """
+    Keeps the optimal assignment of a dense cost matrix together with its
+    row/column potentials so that it can be repaired after the costs change.
+    An update restores dual feasibility for the changed row, column or cell,
+    frees at most one row and re-matches it with a single augmenting path,
+    i.e. O(n^2) per update instead of O(n^3) for a fresh solve.
+
+    Rows must not outnumber columns; spare columns are handled by padding
+    the matrix with zero-cost dummy rows so it is square internally.
+    """
+
+    def __init__(self, cost_matrix):
+        matrix = np.array(cost_matrix, dtype=float)
+        if matrix.ndim != 2 or matrix.shape[0] > matrix.shape[1]:
+            raise ValueError("Cost matrix must be 2-dimensional with rows <= cols, "
+                             "got shape {}".format(matrix.shape))
+        self.rows, cols = matrix.shape
+        self.matrix = np.zeros((cols, cols))
+        self.matrix[:self.rows] = matrix
+        self.row_pot, self.col_pot, self.row_of, self.col_of = _solve_dense(self.matrix)
+
+    def result(self):
+        """
+        The current (assignment, total_cost), in the format of `hungarian`.
+        """
+        cols = self.col_of[:self.rows]
+        assignment = [(row, int(col)) for row, col in enumerate(cols)]
+        total_cost = self.matrix[np.arange(self.rows), cols].sum()
+        return assignment, total_cost.item()
+
+    def _rematch(self, row):
+        col = self.col_of[row]
+        if col != -1:
+            self.row_of[col] = -1
+            self.col_of[row] = -1
+        _augment(self.matrix, row, self.row_pot, self.col_pot, self.row_of, self.col_of)
+
+    def update_row(self, row, costs):
+        """
+        Replace the costs of `row` and repair the assignment.
+        """
+        self.matrix[row] = costs
+        self.row_pot[row] = (self.matrix[row] - self.col_pot).min()
+        self._rematch(row)
+        return self.result()
+
+    def update_column(self, col, costs):
+        """
+        Replace the costs of column `col` (real rows only) and repair the
+        assignment.
+        """
+        self.matrix[:self.rows, col] = costs
+        self.col_pot[col] = (self.matrix[:, col] - self.row_pot).min()
+        row = self.row_of[col]
+        if row != -1:
+            self._rematch(row)
+        return self.result()
+
+    def update_cell(self, row, col, cost):
+        """
+        Change a single cost and repair the assignment.
+        """
+        self.matrix[row, col] = cost
+        reduced = cost - self.row_pot[row] - self.col_pot[col]
+        if reduced < 0:
+            self.row_pot[row] += reduced
+            self._rematch(row)
+        elif self.col_of[row] == col and reduced > 0:
+            self.row_pot[row] = (self.matrix[row] - self.col_pot).min()
+            self._rematch(row)
+        return self.result()
+
+
+def hungarian_sparse(costs, shape=None, stats=None):
+    """
+    Sparse version of `hungarian`: `costs` is a dict {(row, col): cost} or a
+    scipy.sparse matrix, and pairs not listed are forbidden. Each row's
+    augmenting path search is a heap-based Dijkstra over the listed entries
+    only, so large problems with few allowed pairs never become dense.
+    Returns (assignment, total_cost) like `hungarian`; `stats` is recorded
+    as in `hungarian`.
+    """
+    if isinstance(costs, dict):
+        keys = list(costs)
+        row_idx = np.array([r for r, _ in keys], dtype=int)
+        col_idx = np.array([c for _, c in keys], dtype=int)
+        values = np.array([costs[key] for key in keys], dtype=float)
+        if shape is None:
+            shape = (row_idx.max() + 1, col_idx.max() + 1) if keys else (0, 0)
+    else:
+        coo = costs.tocoo()
+        row_idx, col_idx = coo.row.astype(int), coo.col.astype(int)
+        values = coo.data.astype(float)
+        shape = shape or coo.shape
+
+    rows, cols = shape
+    transposed = rows > cols
+    if transposed:
+        row_idx, col_idx, rows, cols = col_idx, row_idx, cols, rows
+    if rows == 0:
+        return [], 0
+
+    # Group entries by row (CSR layout)
+    order = np.lexsort((values, row_idx))
+    row_start = np.searchsorted(row_idx[order], np.arange(rows + 1))
+    entry_cols = col_idx[order].tolist()
+    entry_costs = values[order].tolist()
+    row_start = row_start.tolist()
+
+    row_pot = [0.0] * rows
+    col_pot = [0.0] * cols
+    col_of = [-1] * rows
+    row_of = [-1] * cols
+
+    # Row Reduction; entries are sorted by cost within each row
+    for row in range(rows):
+        start, end = row_start[row], row_start[row + 1]
+        if start == end:
+            raise ValueError("Cost matrix is infeasible")
+        row_pot[row] = entry_costs[start]
+        if row_of[entry_cols[start]] == -1:
+            col_of[row] = entry_cols[start]
+            row_of[entry_cols[start]] = row
+
+    if stats is not None:
+        stats.count('rows_matched_by_reduction', int(rows) - col_of.count(-1))
+
+    for row in range(rows):
+        if col_of[row] != -1:
+            continue
+
+        shortest = {}
+        settled = {}
+        path = {}
+        heap = []
+        visited_rows = []
+        current_row, min_val = row, 0.0
+
+        while True:
+            visited_rows.append(current_row)
+            base = min_val - row_pot[current_row]
+            for k in range(row_start[current_row], row_start[current_row + 1]):
+                col = entry_cols[k]
+                if col in settled:
+                    continue
+                dist = base + entry_costs[k] - col_pot[col]
+                if dist < shortest.get(col, np.inf):
+                    shortest[col] = dist
+                    path[col] = current_row
+                    # Free columns win ties so the search ends sooner
+                    heapq.heappush(heap, (dist, row_of[col] != -1, col))
+
+            while heap and heap[0][2] in settled:
+                heapq.heappop(heap)
+            if not heap:
+                raise ValueError("Cost matrix is infeasible")
+            min_val, _, col = heapq.heappop(heap)
+            settled[col] = min_val
+
+            if row_of[col] == -1:
+                break
+            current_row = row_of[col]
+
+        if stats is not None:
+            stats.count('augmentations')
+            stats.count('augmenting_path_rows', len(visited_rows))
+
+        # Update Potentials
+        row_pot[row] += min_val
+        for r in visited_rows[1:]:
+            row_pot[r] += min_val - settled[col_of[r]]
+        for c, dist in settled.items():
+            col_pot[c] -= min_val - dist
+
+        # Flip the matching along the path back to `row`
+        while True:
+            r = path[col]
+            row_of[col] = r
+            col_of[r], col = col, col_of[r]
+            if r == row:
+                break
+
+    lookup = {}
+    for r, c, value in zip(row_idx.tolist(), col_idx.tolist(), values.tolist()):
+        lookup[r, c] = min(value, lookup.get((r, c), np.inf))
+    total_cost = sum(lookup[row, col] for row, col in enumerate(col_of))
+
+    if transposed:
+        return sorted((col, row) for row, col in enumerate(col_of)), total_cost
+    return list(enumerate(col_of)), total_cost
+
+
+def hungarian_batch(cost_matrices, workers=None):
+    """
+    Solves many independent assignment problems, spread over a pool of
+    `workers` processes when given. Each entry may be anything `hungarian`
+    accepts; results come back in input order in the same format.
+    """
+    cost_matrices = list(cost_matrices)
+    if not workers or workers <= 1:
+        return [hungarian(matrix) for matrix in cost_matrices]
+
+    chunk = max(1, len(cost_matrices) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(hungarian, cost_matrices, chunksize=chunk))
+
+
+def _augment(matrix, row, row_pot, col_pot, row_of, col_of):
+    """
+    Shortest augmenting path from a free `row` to a free column; updates the
+    matching and the potentials in place. Returns the number of rows the
+    search visited.
+    """
+    size = matrix.shape[1]
+    # Reduced path length to each column; settled columns are held at inf
+    # here and recorded in `settled_at`, and `blocked` makes their reduced
+    # cost inf so they are never relaxed again
+    shortest = np.full(size, np.inf)
+    settled_at = np.zeros(size)
+    blocked = col_pot.copy()
+    path = np.full(size, -1)
+    improved = np.empty(size, dtype=bool)
+    reduced = np.empty(size)
+
+    visited_rows = []
+    visited_cols = []
+    current_row, min_val = row, 0.0
+
+    while True:
+        visited_rows.append(current_row)
+        np.subtract(matrix[current_row], blocked, out=reduced)
+        reduced += min_val - row_pot[current_row]
+        np.less(reduced, shortest, out=improved)
+        np.copyto(path, current_row, where=improved)
+        np.copyto(shortest, reduced, where=improved)
+
+        col = int(np.argmin(shortest))
+        min_val = shortest[col]
+        if min_val == np.inf:
+            raise ValueError("Cost matrix is infeasible")
+        if row_of[col] != -1:
+            # Among equally short paths prefer one that ends the search
+            ties = np.flatnonzero(shortest == min_val)
+            free = ties[row_of[ties] == -1]
+            if len(free):
+                col = int(free[0])
+
+        settled_at[col] = min_val
+        shortest[col] = np.inf
+        blocked[col] = -np.inf
+        visited_cols.append(col)
+
+        if row_of[col] == -1:
+            break
+        current_row = row_of[col]
+
+    # Update Potentials
+    row_pot[row] += min_val
+    for r in visited_rows[1:]:
+        row_pot[r] += min_val - settled_at[col_of[r]]
+    visited_cols = np.array(visited_cols)
+    col_pot[visited_cols] -= min_val - settled_at[visited_cols]
+
+    # Flip the matching along the path back to `row`
+    while True:
+        r = path[col]
+        row_of[col] = r
+        col_of[r], col = col, col_of[r]
+        if r == row:
+            break
+
+    return len(visited_rows)
+
+
+if __name__ == '__main__':
+    costs = [
+        [4, 1, 3],
+        [2, 0, 5],
+        [3, 2, 2]
+    ]
+
+    print(hungarian(costs))
@@ -9,6 +9,15 @@
        \    |    /
          (D)--4--(E)
 """
+import os
+import tempfile
+
+import numpy as np
+
+from array_io import read_csv_chunks
+from graph_core import CSRGraph
+from solver_stats import phase
+
 graph = {
     'A': [('B', 4), ('C', 2), ('F', 5)],
     'B': [('A', 4), ('C', 1), ('D', 6)],
@@ -18,7 +27,9 @@ graph = {
     'F': [('A', 5), ('C', 3), ('E', 7)]
 }
 
-def kruskals(graph):
+def kruskals(graph, stats=None):
+    # progress goes to print, or through stats.log when stats are collected
+    log = stats.log if stats is not None else print
     mst_edges = []
     total_weight = 0
     
@@ -34,9 +45,9 @@ def kruskals(graph):
 
     all_edges.sort(key=lambda x: x[2])
     
-    print("Sorted Edges (Kruskal's Priority):")
-    print(all_edges)
-    print("\n--- Processing Edges ---")
+    log("Sorted Edges (Kruskal's Priority):")
+    log(all_edges)
+    log("\n--- Processing Edges ---")
 
     # union find
     parent = {node: node for node in graph}
@@ -58,14 +69,293 @@ def kruskals(graph):
 
     for u, v, w in all_edges:
         if union(u, v):
-            print(f" Accepting Edge: ({u}, {v}) Weight: {w}")
+            log(f" Accepting Edge: ({u}, {v}) Weight: {w}")
             mst_edges.append((u, v))
             total_weight += w
         else:
-            print(f" Rejecting Edge: ({u}, {v}) Weight: {w} (Creates Cycle)")
+            log(f" Rejecting Edge: ({u}, {v}) Weight: {w} (Creates Cycle)")
+
+    if stats is not None:
+        stats.count('edges_examined', len(all_edges))
+        stats.count('finds', 2 * len(all_edges))
+        stats.count('unions', len(mst_edges))
 
     return mst_edges, total_weight
 
+def edge_arrays(graph):
+    # relabel nodes to 0..V-1 and keep each undirected edge once (u < v)
+    if isinstance(graph, CSRGraph):
+        src, dst, weights = graph.edge_arrays()
+        keep = src != dst
+        return graph.nodes, src[keep], dst[keep], weights[keep]
+
+    nodes = list(graph)
+    index = {node: i for i, node in enumerate(nodes)}
+
+    src, dst, weights = [], [], []
+    for node in graph:
+        u = index[node]
+        for neighbor, weight in graph[node]:
+            v = index[neighbor]
+            if u < v:
+                src.append(u)
+                dst.append(v)
+                weights.append(weight)
+
+    dtype = np.int32 if len(nodes) < 2**31 else np.int64
+    return nodes, np.array(src, dtype=dtype), np.array(dst, dtype=dtype), np.array(weights)
+
+def _union_sorted_edges(parent, rank, src, dst, limit, stats=None):
+    # run weight-sorted candidate edges through the union find (union by
+    # rank, path halving, no recursion); stops after `limit` accepted edges
+    # returns (parent, positions of accepted edges)
+    # with parent as an array, every node is first pointed straight at its
+    # root, so edges inside one component are dropped with a vectorized
+    # check and only the rest reach the loop; that costs O(V) per call, so
+    # callers with few edges per call pass a list instead, which is updated
+    # in place and returned as is
+    as_array = isinstance(parent, np.ndarray)
+    if as_array:
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+        candidates = np.flatnonzero(parent[src] != parent[dst])
+        parent = parent.tolist()
+    else:
+        candidates = np.arange(len(src))
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    accepted = []
+    for e, u, v in zip(candidates.tolist(), src[candidates].tolist(), dst[candidates].tolist()):
+        if len(accepted) == limit:
+            break
+        root1 = find(u)
+        root2 = find(v)
+        if root1 == root2:
+            continue
+        if rank[root1] < rank[root2]:
+            root1, root2 = root2, root1
+        parent[root2] = root1
+        if rank[root1] == rank[root2]:
+            rank[root1] += 1
+        accepted.append(e)
+
+    if stats is not None:
+        # the loop only stops early right after accepting its last edge
+        looped = len(candidates)
+        if len(accepted) == limit and accepted:
+            looped = int(np.searchsorted(candidates, accepted[-1])) + 1
+        stats.count('edges_examined', len(src))
+        stats.count('edges_filtered', len(src) - len(candidates))
+        stats.count('finds', 2 * looped)
+        stats.count('unions', len(accepted))
+
+    return (np.array(parent) if as_array else parent), np.array(accepted, dtype=np.int64)
+
+def kruskals_arrays(num_nodes, src, dst, weights, stats=None):
+    # quiet Kruskal over edge arrays; returns (indices of MST edges, total weight)
+    # sorted edges go through the union find one block at a time
+    with phase(stats, 'sort'):
+        order = np.argsort(weights, kind='stable')
+    block = max(num_nodes, 1 << 16)
+
+    parent = np.arange(num_nodes)
+    rank = [0] * num_nodes
+    accepted = []
+    remaining = num_nodes - 1
+
+    with phase(stats, 'union_find'):
+        for start in range(0, len(order), block):
+            if remaining <= 0:
+                break
+            edges = order[start:start + block]
+            parent, taken = _union_sorted_edges(parent, rank, src[edges], dst[edges], remaining,
+                                                stats)
+            accepted.append(edges[taken])
+            remaining -= len(taken)
+
+    accepted = np.concatenate(accepted) if accepted else np.array([], dtype=np.int64)
+    return accepted, weights[accepted].sum()
+
+def kruskals_fast(graph, stats=None):
+    # same result format as kruskals, without the printing
+    with phase(stats, 'edge_arrays'):
+        nodes, src, dst, weights = edge_arrays(graph)
+    accepted, total_weight = kruskals_arrays(len(nodes), src, dst, weights, stats)
+    mst_edges = [(nodes[src[e]], nodes[dst[e]]) for e in accepted]
+    return mst_edges, total_weight.item()
+
+def _read_edge_chunks(path, chunk_edges):
+    # yields (src, dst, weights) arrays from a "u,v,weight" file, chunk by chunk
+    for chunk in read_csv_chunks(path, chunk_edges):
+        yield chunk[:, 0].astype(np.int64), chunk[:, 1].astype(np.int64), chunk[:, 2]
+
+EDGE_RECORD = np.dtype([('u', np.int64), ('v', np.int64), ('w', np.float64)])
+
+# most bucket files kruskals_streaming keeps open at once; larger inputs get
+# bigger buckets, which are then sorted externally
+MAX_BUCKET_FILES = 256
+
+# number of weights kruskals_streaming keeps to pick bucket boundaries
+WEIGHT_SAMPLE_SIZE = 200_000
+
+def _reservoir_update(sample, keys, weights, rng, size):
+    # uniform sample of everything seen so far without replacement: every
+    # weight gets a random key and the `size` smallest keys are kept, so the
+    # sample never grows past `size` however many chunks arrive
+    new_keys = rng.random(len(weights))
+    keys = np.concatenate([keys, new_keys])
+    sample = np.concatenate([sample, weights])
+    if len(keys) > size:
+        keep = np.argpartition(keys, size)[:size]
+        keys, sample = keys[keep], sample[keep]
+    return sample, keys
+
+def _sorted_bucket(path, chunk_edges, stats=None):
+    # yields the records of a bucket file in weight order, about chunk_edges
+    # at a time; a bucket that fits is sorted in memory, a bigger one (e.g.
+    # every edge with the same weight) is cut into sorted runs on disk which
+    # are then merged a block per run at a time
+    size = os.path.getsize(path) // EDGE_RECORD.itemsize
+    if size <= chunk_edges:
+        with phase(stats, 'sort'):
+            records = np.fromfile(path, dtype=EDGE_RECORD)
+            os.remove(path)
+            records = records[np.argsort(records['w'], kind='stable')]
+        yield records
+        return
+
+    runs = []
+    with phase(stats, 'sort'):
+        for start in range(0, size, chunk_edges):
+            records = np.fromfile(path, dtype=EDGE_RECORD, count=chunk_edges,
+                                  offset=start * EDGE_RECORD.itemsize)
+            run = f'{path}.run{len(runs)}'
+            records[np.argsort(records['w'], kind='stable')].tofile(run)
+            runs.append(run)
+        os.remove(path)
+
+    # per run: file offset (in records), total records and the loaded block;
+    # blocks and the pending output stay around chunk_edges together
+    block = max(1, chunk_edges // (2 * len(runs)))
+    offsets = [0] * len(runs)
+    totals = [os.path.getsize(run) // EDGE_RECORD.itemsize for run in runs]
+    buffers = [np.empty(0, dtype=EDGE_RECORD) for _ in runs]
+    pending, pending_size = [], 0
+
+    while True:
+        with phase(stats, 'sort'):
+            for i, run in enumerate(runs):
+                if not len(buffers[i]) and offsets[i] < totals[i]:
+                    buffers[i] = np.fromfile(run, dtype=EDGE_RECORD, count=block,
+                                             offset=offsets[i] * EDGE_RECORD.itemsize)
+                    offsets[i] += len(buffers[i])
+            live = [i for i in range(len(runs)) if len(buffers[i])]
+            if not live:
+                break
+            # anything not yet loaded from run i weighs at least the last
+            # weight in its block, so everything up to the smallest such
+            # weight can be released now; the run that sets it empties its
+            # block, so every pass makes progress
+            unfinished = [buffers[i]['w'][-1] for i in live if offsets[i] < totals[i]]
+            limit = min(unfinished) if unfinished else np.inf
+            for i in live:
+                k = np.searchsorted(buffers[i]['w'], limit, side='right')
+                pending.append(buffers[i][:k])
+                pending_size += k
+                buffers[i] = buffers[i][k:]
+
+        if pending_size >= chunk_edges // 2:
+            merged = np.concatenate(pending)
+            pending, pending_size = [], 0
+            yield merged[np.argsort(merged['w'], kind='stable')]
+
+    for run in runs:
+        os.remove(run)
+    if pending_size:
+        merged = np.concatenate(pending)
+        yield merged[np.argsort(merged['w'], kind='stable')]
+
+def kruskals_streaming(edge_file, mst_file, num_nodes=None, chunk_edges=1_000_000, stats=None):
+    # out-of-core Kruskal for edge lists larger than memory
+    # edge_file holds "u,v,weight" lines with integer nodes 0..V-1; MST edges
+    # are appended to mst_file in the same format as they are accepted
+    # pass 1 samples the weights to pick bucket boundaries, pass 2 spills
+    # every edge into the temp file of its weight range (at most
+    # MAX_BUCKET_FILES of them), and the buckets are then sorted and fed to
+    # the union find one at a time, cheapest first; buckets over chunk_edges
+    # (large inputs, or repeated weights) are merge sorted on disk, so only
+    # O(V) plus about chunk_edges edges (and a WEIGHT_SAMPLE_SIZE sample of
+    # weights) are ever in memory
+    # returns (number of MST edges, total weight)
+    sample, keys = np.array([]), np.array([])
+    max_node = -1
+    total_edges = 0
+    rng = np.random.default_rng(0)
+    with phase(stats, 'sample'):
+        for src, dst, weights in _read_edge_chunks(edge_file, chunk_edges):
+            total_edges += len(weights)
+            max_node = max(max_node, src.max(), dst.max())
+            sample, keys = _reservoir_update(sample, keys, weights, rng, WEIGHT_SAMPLE_SIZE)
+    if num_nodes is None:
+        num_nodes = int(max_node) + 1
+
+    num_buckets = min(MAX_BUCKET_FILES, max(1, -(-total_edges // chunk_edges)))
+    bounds = np.quantile(sample, np.arange(1, num_buckets) / num_buckets) if len(sample) else []
+    # repeated weights give repeated bounds, i.e. buckets that stay empty
+    bounds = np.unique(bounds)
+    num_buckets = len(bounds) + 1
+
+    # the vectorized filter pays O(V) per block, which only pays off while
+    # blocks are at least as large as the node count
+    parent = np.arange(num_nodes) if num_nodes <= chunk_edges else list(range(num_nodes))
+    rank = [0] * num_nodes
+    remaining = num_nodes - 1
+    mst_size, total_weight = 0, 0.0
+
+    with tempfile.TemporaryDirectory() as tmp, open(mst_file, 'w') as out:
+        paths = [os.path.join(tmp, f'bucket{i}.bin') for i in range(num_buckets)]
+        handles = [open(path, 'wb') for path in paths]
+        with phase(stats, 'partition'):
+            try:
+                for src, dst, weights in _read_edge_chunks(edge_file, chunk_edges):
+                    bucket = np.searchsorted(bounds, weights, side='right')
+                    for i in np.unique(bucket):
+                        mask = bucket == i
+                        records = np.empty(mask.sum(), dtype=EDGE_RECORD)
+                        records['u'], records['v'] = src[mask], dst[mask]
+                        records['w'] = weights[mask]
+                        records.tofile(handles[i])
+            finally:
+                for handle in handles:
+                    handle.close()
+
+        for path in paths:
+            for records in _sorted_bucket(path, chunk_edges, stats):
+                if remaining <= 0:
+                    break
+                with phase(stats, 'union_find'):
+                    parent, taken = _union_sorted_edges(parent, rank, records['u'], records['v'],
+                                                        remaining, stats)
+                    taken = records[taken]
+                    np.savetxt(out, np.column_stack([taken['u'], taken['v'], taken['w']]),
+                               delimiter=',', fmt=['%d', '%d', '%.17g'])
+                remaining -= len(taken)
+                mst_size += len(taken)
+                total_weight += taken['w'].sum()
+            if remaining <= 0:
+                break
+
+    return mst_size, float(total_weight)
+
 if __name__ == '__main__':
     edges, total = kruskals(graph)
     print("\n=============================")
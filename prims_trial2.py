@@ -10,6 +10,13 @@
          (D)--4--(E)
 """
 
+import heapq
+from itertools import count
+
+import numpy as np
+
+from graph_core import CSRGraph
+
 graph = {
     'A': [('B', 4), ('C', 2), ('F', 5)],
     'B': [('A', 4), ('C', 1), ('D', 6)],
@@ -19,42 +26,184 @@ graph = {
     'F': [('A', 5), ('C', 3), ('E', 7)]
 }
 
-def prims(graph, start):
-    visited = []
+def prims(graph, start, verbose=False, stats=None):
+    # verbose progress goes to print, or through stats.log when stats are collected
+    if isinstance(graph, CSRGraph):
+        return _prims_csr(graph, start, verbose, stats)
+    log = stats.log if stats is not None else print
+    visited = set()
     mst_edges = []
     total_weight = 0
 
-    visited.append(start)
-    while len(visited) < len(graph):
-        min_edge = None
-        min_weight = 0
-
-        # Prims logic
-        for node in visited:
-            print (f'--{visited}-- Node: {node}')
-            print ('The available edges are: ')
-
-            # Printing available edges
-            for neighbor, weight in graph[node]:
-                if neighbor not in visited:
-                    edges = (node, neighbor, weight)
-                    print(f'\t{edges}')
-            print(f'')
-
-            # Picking the minimum weight
-            for neighbor, weight in graph[node]:
-                if neighbor not in visited and (min_weight == 0 or min_weight > weight):
-                    min_edge = (node, neighbor)
-                    min_weight = weight
-        print('=============================\n')
-        mst_edges.append(min_edge)
-        total_weight += min_weight
-        visited.append(min_edge[1])
+    # Candidate edges leaving the tree, cheapest first; the counter breaks
+    # ties in insertion order so nodes themselves are never compared
+    heap = []
+    order = count()
+
+    def visit(node):
+        visited.add(node)
+        for neighbor, weight in graph[node]:
+            if neighbor not in visited:
+                heapq.heappush(heap, (weight, next(order), node, neighbor))
+
+    # Unreachable nodes start a new tree, giving a minimum spanning forest
+    roots = [start] + [node for node in graph if node != start]
+    for root in roots:
+        if root in visited:
+            continue
+        visit(root)
+
+        while heap:
+            weight, _, node, neighbor = heapq.heappop(heap)
+            if neighbor in visited:
+                continue
+
+            if verbose:
+                log(f'--{len(visited)} visited-- Edge: ({node}, {neighbor}) Weight: {weight}')
+                log(f'\t{len(heap)} candidate edges left in the heap')
+
+            mst_edges.append((node, neighbor))
+            total_weight += weight
+            visit(neighbor)
+
+        if verbose:
+            log('=============================\n')
+
+    if stats is not None:
+        # every pushed edge is popped once, either into the tree or as stale
+        pushes = next(order)
+        stats.count('heap_pushes', pushes)
+        stats.count('stale_pops', pushes - len(mst_edges))
+        stats.count('edges_examined', sum(len(graph[node]) for node in visited))
 
     return mst_edges, total_weight
 
+def _prims_csr(graph, start, verbose=False, stats=None):
+    # Same search on a CSRGraph, over integer vertex ids, reading each
+    # visited vertex's slice of the neighbor and weight arrays directly
+    log = stats.log if stats is not None else print
+    nodes, offsets, neighbors, weights = graph.nodes, graph.offsets, graph.neighbors, graph.weights
+    visited = np.zeros(len(nodes), dtype=bool)
+    num_visited = 0
+    mst_edges = []
+    total_weight = 0
+
+    heap = []
+    order = count()
+
+    def visit(node):
+        nonlocal num_visited
+        visited[node] = True
+        num_visited += 1
+        lo, hi = offsets[node], offsets[node + 1]
+        outside = ~visited[neighbors[lo:hi]]
+        for neighbor, weight in zip(neighbors[lo:hi][outside].tolist(),
+                                    weights[lo:hi][outside].tolist()):
+            heapq.heappush(heap, (weight, next(order), node, neighbor))
+
+    start = graph.index[start]
+    for root in [start] + [node for node in range(len(nodes)) if node != start]:
+        if visited[root]:
+            continue
+        visit(root)
+
+        while heap:
+            weight, _, node, neighbor = heapq.heappop(heap)
+            if visited[neighbor]:
+                continue
+
+            if verbose:
+                log(f'--{num_visited} visited-- Edge: ({nodes[node]}, {nodes[neighbor]}) '
+                    f'Weight: {weight}')
+                log(f'\t{len(heap)} candidate edges left in the heap')
+
+            mst_edges.append((nodes[node], nodes[neighbor]))
+            total_weight += weight
+            visit(neighbor)
+
+        if verbose:
+            log('=============================\n')
+
+    if stats is not None:
+        pushes = next(order)
+        stats.count('heap_pushes', pushes)
+        stats.count('stale_pops', pushes - len(mst_edges))
+        stats.count('edges_examined', len(neighbors))
+
+    return mst_edges, total_weight
+
+def prims_dense(coordinates=None, weight_matrix=None, start=0):
+    # O(V^2) Prim's for complete graphs given as a (V, d) coordinate array
+    # (Euclidean weights, computed one row at a time) or a dense (V, V)
+    # weight matrix; no adjacency dict is built
+    # the first m slots of outside/key/parent describe the nodes still
+    # outside the tree and their cheapest known edge into it; a node that
+    # joins the tree is swapped with the last slot and m shrinks
+    if (coordinates is None) == (weight_matrix is None):
+        raise ValueError("Pass exactly one of coordinates or weight_matrix")
+    if coordinates is not None:
+        # one contiguous column per dimension, reordered along with `outside`;
+        # keys are squared distances until an edge is taken
+        columns = np.array(coordinates, dtype=float).T.copy()
+        num_nodes = columns.shape[1]
+    else:
+        weight_matrix = np.asarray(weight_matrix, dtype=float)
+        num_nodes = len(weight_matrix)
+
+    mst_edges = []
+    total_weight = 0
+    if num_nodes == 0:
+        return mst_edges, total_weight
+
+    outside = np.arange(num_nodes)
+    key = np.full(num_nodes, np.inf)
+    parent = np.full(num_nodes, start)
+    new_weights = np.empty(num_nodes)
+    scratch = np.empty(num_nodes)
+    closer = np.empty(num_nodes, dtype=bool)
+
+    def swap_out(i, m):
+        last = m - 1
+        outside[i], key[i], parent[i] = outside[last], key[last], parent[last]
+        if coordinates is not None:
+            columns[:, i] = columns[:, last]
+
+    node, m = start, num_nodes
+    point = columns[:, start].copy() if coordinates is not None else None
+    swap_out(start, m)
+    m -= 1
+
+    while m:
+        weights = new_weights[:m]
+        if coordinates is not None:
+            weights[:] = 0
+            for dim in range(len(point)):
+                np.subtract(columns[dim, :m], point[dim], out=scratch[:m])
+                np.multiply(scratch[:m], scratch[:m], out=scratch[:m])
+                weights += scratch[:m]
+        else:
+            np.take(weight_matrix[node], outside[:m], out=weights)
+
+        np.less(weights, key[:m], out=closer[:m])
+        np.copyto(key[:m], weights, where=closer[:m])
+        np.copyto(parent[:m], node, where=closer[:m])
+
+        i = int(np.argmin(key[:m]))
+        node, weight = int(outside[i]), key[i]
+        # An infinite key means the rest is unreachable: start a new tree
+        if weight != np.inf:
+            mst_edges.append((int(parent[i]), node))
+            total_weight += np.sqrt(weight) if coordinates is not None else weight
+        if coordinates is not None:
+            point = columns[:, i].copy()
+
+        swap_out(i, m)
+        m -= 1
+
+    return mst_edges, float(total_weight)
+
 if __name__ == '__main__':
-    edges, total = prims(graph, 'A')
+    edges, total = prims(graph, 'A', verbose=True)
     print("MST edges:", edges)
     print("Total weight:", total)
 
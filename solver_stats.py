@@ -0,0 +1,72 @@
+"""
+Opt-in instrumentation for the solvers in this repository.
+
+Solvers take an optional `stats` argument. Left as None (the default) they
+do no bookkeeping at all; given a SolverStats they record how long each
+phase took and how much work was done (edges examined, union-find finds,
+heap pushes, 2-opt moves, augmenting paths, color conflicts checked, ...).
+Counters are only added up at points that already exist in the algorithm,
+so the hot loops are the same whether or not stats are collected.
+
+Progress messages that the solvers used to print go through `log` instead,
+so they can be printed, collected or dropped:
+
+    stats = SolverStats(log=print)
+    kruskals(graph, stats=stats)
+    print(stats.summary())
+"""
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+
+class SolverStats:
+    """
+    Per-phase wall clock times and named operation counters.
+
+    `log` is called with every progress message (pass `print` to see them,
+    or leave it as None to drop them). `on_phase`, if given, is called as
+    on_phase(name, seconds) whenever a phase ends.
+    """
+
+    def __init__(self, log=None, on_phase=None):
+        self.timings = {}
+        self.counters = Counter()
+        self.log_func = log
+        self.on_phase = on_phase
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Times the enclosed block; repeated phases of the same name add up.
+        """
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - started
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+            if self.on_phase is not None:
+                self.on_phase(name, elapsed)
+
+    def log(self, message):
+        if self.log_func is not None:
+            self.log_func(message)
+
+    def as_dict(self):
+        return {'timings': dict(self.timings), 'counters': dict(self.counters)}
+
+    def summary(self):
+        lines = [f"{name:<28}{seconds:>10.4f}s" for name, seconds in self.timings.items()]
+        lines += [f"{name:<28}{value:>11}" for name, value in self.counters.items()]
+        return '\n'.join(lines)
+
+
+def phase(stats, name):
+    """
+    `stats.phase(name)`, or a no-op context when stats are disabled.
+    """
+    return stats.phase(name) if stats is not None else nullcontext()
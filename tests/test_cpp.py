@@ -0,0 +1,143 @@
+from collections import Counter
+
+import numpy as np
+
+import CPP
+from graph_core import CSRGraph
+
+
+def _random_connected_graph(n, extra, seed):
+    # A random spanning tree plus `extra` random edges, integer weights
+    rng = np.random.default_rng(seed)
+    graph = {i: [] for i in range(n)}
+
+    def add(u, v):
+        w = int(rng.integers(1, 20))
+        graph[u].append((v, w))
+        graph[v].append((u, w))
+
+    for v in range(1, n):
+        add(int(rng.integers(0, v)), v)
+    for _ in range(extra):
+        u, v = rng.integers(0, n, 2).tolist()
+        if u != v:
+            add(u, v)
+    return graph
+
+
+def _check_route(graph, total, route):
+    # A closed walk along graph edges that covers every edge
+    assert route[0] == route[-1]
+    weights = {}
+    for u in graph:
+        for v, w in graph[u]:
+            if u < v:
+                weights.setdefault(frozenset((u, v)), []).append(w)
+    walked = Counter(frozenset(step) for step in zip(route, route[1:]))
+    assert set(walked) == set(weights)
+    for edge, times in walked.items():
+        assert times >= len(weights[edge])
+    assert sum(min(weights[frozenset(step)]) for step in zip(route, route[1:])) <= total
+
+
+def test_dijkstra_matches_on_dict_and_csr():
+    graph = _random_connected_graph(60, 80, 0)
+    csr = CSRGraph.from_dict(graph)
+    for start in (0, 17, 59):
+        dist, prev = CPP.dijkstra_with_paths(graph, start)
+        csr_dist, csr_prev = CPP.dijkstra_with_paths(csr, start)
+        assert dist == csr_dist
+        for node in graph:
+            # Following the predecessors adds up to the distance
+            total, current = 0, node
+            while prev[current] is not None:
+                total += min(w for v, w in graph[prev[current]] if v == current)
+                current = prev[current]
+            assert current == start and total == dist[node]
+
+
+def test_chinese_postman_route_covers_every_edge():
+    for seed in range(5):
+        graph = _random_connected_graph(40, 30, seed)
+        total, route = CPP.chinese_postman(graph)
+        _check_route(graph, total, route)
+        csr_total, csr_route = CPP.chinese_postman(CSRGraph.from_dict(graph))
+        assert csr_total == total
+        _check_route(graph, csr_total, csr_route)
+
+
+def test_odd_distance_matrix_with_workers():
+    graph = _random_connected_graph(50, 40, 7)
+    odd = CPP.odd_degree_nodes(graph)
+    serial, prevs = CPP.odd_distance_matrix(graph, odd, with_paths=True)
+    pooled, pooled_prevs = CPP.odd_distance_matrix(graph, odd, workers=2, with_paths=True)
+    assert serial == pooled
+    assert CPP.odd_distance_matrix(graph, odd) == serial
+    for u in odd:
+        for v in odd:
+            path = CPP._path_edges(graph, pooled_prevs[u], v)
+            assert (path[-1][0] if path else v) == u
+
+
+def _random_dist_matrix(n, seed, metric=True):
+    # Node labels are strings so nothing relies on integer nodes
+    rng = np.random.default_rng(seed)
+    nodes = [f'n{i}' for i in range(n)]
+    if metric:
+        points = rng.random((n, 2)) * 100
+        values = np.hypot(*(points[:, None] - points[None]).transpose(2, 0, 1))
+    else:
+        values = rng.integers(1, 50, (n, n)).astype(float)
+        values = np.minimum(values, values.T)
+    return nodes, {u: {v: float(values[i, j]) for j, v in enumerate(nodes)}
+                   for i, u in enumerate(nodes)}
+
+
+def test_min_weight_matching_matches_exhaustive(monkeypatch):
+    # Force the blossom path even on inputs small enough for the exhaustive
+    # search, which then serves as the reference
+    monkeypatch.setattr(CPP, 'EXHAUSTIVE_MATCHING_LIMIT', 0)
+    for seed in range(20):
+        n = 2 * (2 + seed % 6)
+        nodes, dist_matrix = _random_dist_matrix(n, seed, metric=seed % 2 == 0)
+        expected, _ = CPP.exhaustive_min_weight_matching(nodes, dist_matrix)
+        cost, pairs = CPP.min_weight_matching(nodes, dist_matrix)
+        assert np.isclose(cost, expected)
+        assert sorted(node for pair in pairs for node in pair) == sorted(nodes)
+        assert np.isclose(sum(dist_matrix[u][v] for u, v in pairs), cost)
+
+
+def test_min_weight_matching_above_exhaustive_limit():
+    nodes, dist_matrix = _random_dist_matrix(14, 99)
+    expected, _ = CPP.exhaustive_min_weight_matching(nodes, dist_matrix)
+    assert np.isclose(CPP.min_weight_matching(nodes, dist_matrix)[0], expected)
+    # The sparsified candidate graph still finds it here, or falls back
+    assert CPP.min_weight_matching(nodes, dist_matrix, candidates=3)[0] >= expected - 1e-9
+
+
+def test_min_weight_matching_unreachable_pairs(monkeypatch):
+    monkeypatch.setattr(CPP, 'EXHAUSTIVE_MATCHING_LIMIT', 0)
+    inf = float('inf')
+    nodes = ['a', 'b', 'c', 'd']
+    dist_matrix = {
+        'a': {'a': 0, 'b': 1, 'c': inf, 'd': inf},
+        'b': {'a': 1, 'b': 0, 'c': inf, 'd': inf},
+        'c': {'a': inf, 'b': inf, 'c': 0, 'd': 2},
+        'd': {'a': inf, 'b': inf, 'c': 2, 'd': 0},
+    }
+    assert CPP.min_weight_matching(nodes, dist_matrix)[0] == 3
+    assert CPP.exhaustive_min_weight_matching(nodes, dist_matrix)[0] == 3
+
+
+def test_chinese_postman_float_weights():
+    triangle = {0: [(1, 1.5), (2, 1.5)], 1: [(0, 1.5), (2, 1.5)], 2: [(0, 1.5), (1, 1.5)]}
+    total, route = CPP.chinese_postman(triangle)
+    assert total == 4.5
+    _check_route(triangle, total, route)
+    total, route = CPP.chinese_postman({0: [(1, 1.5)], 1: [(0, 1.5)]})
+    assert total == 3.0 and route in ([0, 1, 0], [1, 0, 1])
+    graph = {u: [(v, w + 0.25) for v, w in adj]
+             for u, adj in _random_connected_graph(30, 20, 3).items()}
+    total, route = CPP.chinese_postman(graph)
+    _check_route(graph, total, route)
+    assert CPP.chinese_postman(CSRGraph.from_dict(graph))[0] == total
@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+from scipy import sparse
+from scipy.optimize import linear_sum_assignment
+
+import hungarian
+
+
+def _check(matrix, assignment, total):
+    # A valid assignment of the right size whose cost is the optimum
+    matrix = np.asarray(matrix, dtype=float)
+    rows, cols = zip(*assignment) if assignment else ((), ())
+    assert len(set(rows)) == len(rows) and len(set(cols)) == len(cols)
+    assert len(assignment) == min(matrix.shape)
+    assert np.isclose(sum(matrix[r, c] for r, c in assignment), total)
+    expected_rows, expected_cols = linear_sum_assignment(matrix)
+    assert np.isclose(total, matrix[expected_rows, expected_cols].sum())
+
+
+def _random_costs(rng, shape, integer):
+    if integer:
+        # Small integer costs give many ties
+        return rng.integers(0, 10, shape).astype(float)
+    return rng.random(shape) * 100
+
+
+def test_square_and_rectangular():
+    rng = np.random.default_rng(0)
+    for seed in range(40):
+        shape = tuple(rng.integers(1, 12, 2)) if seed % 2 else (seed % 12 + 1,) * 2
+        matrix = _random_costs(rng, shape, integer=seed % 3 == 0)
+        _check(matrix, *hungarian.hungarian(matrix))
+    assert hungarian.hungarian([[4, 1, 3], [2, 0, 5], [3, 2, 2]]) == ([(0, 1), (1, 0), (2, 2)], 5)
+
+
+def test_forbidden_entries():
+    rng = np.random.default_rng(1)
+    for _ in range(30):
+        shape = tuple(rng.integers(2, 10, 2))
+        matrix = _random_costs(rng, shape, integer=False)
+        matrix[rng.random(shape) < 0.3] = np.inf
+        try:
+            expected_rows, expected_cols = linear_sum_assignment(matrix)
+        except ValueError:
+            with pytest.raises(ValueError):
+                hungarian.hungarian(matrix)
+            continue
+        assignment, total = hungarian.hungarian(matrix)
+        assert np.isclose(total, matrix[expected_rows, expected_cols].sum())
+        assert all(np.isfinite(matrix[r, c]) for r, c in assignment)
+
+
+def test_dict_and_scipy_sparse():
+    rng = np.random.default_rng(2)
+    for _ in range(30):
+        shape = tuple(rng.integers(2, 10, 2))
+        matrix = _random_costs(rng, shape, integer=bool(rng.integers(2)))
+        allowed = rng.random(shape) < 0.6
+        dense = np.where(allowed, matrix, np.inf)
+        costs = {(int(r), int(c)): matrix[r, c] for r, c in zip(*np.nonzero(allowed))}
+        try:
+            expected_rows, expected_cols = linear_sum_assignment(dense)
+        except ValueError:
+            with pytest.raises(ValueError):
+                hungarian.hungarian_sparse(costs, shape=shape)
+            continue
+        expected = dense[expected_rows, expected_cols].sum()
+
+        assignment, total = hungarian.hungarian_sparse(costs, shape=shape)
+        assert np.isclose(total, expected)
+        assert all((r, c) in costs for r, c in assignment)
+        # Zero costs must survive the conversion, so shift them off zero
+        coo = sparse.coo_matrix((np.array(list(costs.values())) + 1, tuple(zip(*costs))),
+                                shape=shape)
+        assert np.isclose(hungarian.hungarian(coo)[1], expected + min(shape))
+        # Without a shape the dict's largest row and column set it
+        rows, cols = zip(*costs)
+        if (max(rows) + 1, max(cols) + 1) == shape:
+            assert np.isclose(hungarian.hungarian(costs)[1], expected)
+
+
+def test_infeasible_inputs_raise():
+    inf = np.inf
+    with pytest.raises(ValueError):
+        hungarian.hungarian([[1, 2], [inf, inf]])
+    # Every row is allowed somewhere, but two rows share their only column
+    with pytest.raises(ValueError):
+        hungarian.hungarian([[1, inf, inf], [2, inf, inf], [3, 4, 5]])
+    with pytest.raises(ValueError):
+        hungarian.hungarian({(0, 0): 1, (1, 0): 2, (2, 1): 3, (2, 2): 4})
+    with pytest.raises(ValueError):
+        hungarian.hungarian_sparse({(0, 0): 1, (0, 1): 2}, shape=(2, 2))
+    with pytest.raises(ValueError):
+        hungarian.hungarian(np.zeros((2, 2, 2)))
+
+
+def test_solver_updates_match_fresh_solve():
+    rng = np.random.default_rng(3)
+    for seed in range(10):
+        rows = int(rng.integers(2, 9))
+        cols = rows + int(rng.integers(0, 3)) * (seed % 2)
+        integer = seed % 3 == 0
+        matrix = _random_costs(rng, (rows, cols), integer)
+        solver = hungarian.HungarianSolver(matrix)
+        _check(matrix, *solver.result())
+
+        for _ in range(30):
+            kind = rng.integers(3)
+            if kind == 0:
+                row = int(rng.integers(rows))
+                matrix[row] = _random_costs(rng, cols, integer)
+                result = solver.update_row(row, matrix[row])
+            elif kind == 1:
+                col = int(rng.integers(cols))
+                matrix[:, col] = _random_costs(rng, rows, integer)
+                result = solver.update_column(col, matrix[:, col])
+            else:
+                row, col = int(rng.integers(rows)), int(rng.integers(cols))
+                # Bias cell changes towards the assigned cells, where the
+                # repair has to free the row
+                if rng.random() < 0.5:
+                    col = solver.col_of[row]
+                matrix[row, col] = _random_costs(rng, (), integer)
+                result = solver.update_cell(row, col, matrix[row, col])
+            _check(matrix, *result)
+            assert result == solver.result()
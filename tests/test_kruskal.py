@@ -0,0 +1,102 @@
+import builtins
+
+import numpy as np
+
+import kruskal
+
+
+def _write_edges(path, src, dst, weights):
+    np.savetxt(path, np.column_stack([src, dst, weights]), delimiter=',',
+               fmt=['%d', '%d', '%.17g'])
+
+
+def _random_edges(n, m, seed, weights=None):
+    rng = np.random.default_rng(seed)
+    src, dst = rng.integers(0, n, m), rng.integers(0, n, m)
+    if weights is None:
+        weights = rng.random(m)
+    return src, dst, weights
+
+
+def _reference_total(n, src, dst, weights):
+    keep = src != dst
+    _, total = kruskal.kruskals_arrays(n, src[keep], dst[keep], weights[keep])
+    return total
+
+
+def test_fast_matches_original(capsys):
+    edges, total = kruskal.kruskals(kruskal.graph)
+    assert kruskal.kruskals_fast(kruskal.graph)[1] == total
+    assert len(edges) == len(kruskal.graph) - 1
+
+
+def test_streaming_matches_in_memory(tmp_path):
+    src, dst, weights = _random_edges(300, 5000, 0)
+    _write_edges(tmp_path / 'edges.csv', src, dst, weights)
+    size, total = kruskal.kruskals_streaming(tmp_path / 'edges.csv', tmp_path / 'mst.csv',
+                                             num_nodes=300, chunk_edges=400)
+    assert size == 299
+    assert np.isclose(total, _reference_total(300, src, dst, weights))
+    assert len(np.loadtxt(tmp_path / 'mst.csv', delimiter=',', ndmin=2)) == size
+
+
+def test_streaming_equal_weights_stay_within_chunk(tmp_path, monkeypatch):
+    # Every weight equal puts every edge in one bucket; it must still be
+    # handed to the union find at most about chunk_edges at a time
+    src, dst, weights = _random_edges(500, 20000, 1, np.ones(20000))
+    _write_edges(tmp_path / 'edges.csv', src, dst, weights)
+
+    sizes = []
+    union = kruskal._union_sorted_edges
+
+    def recording_union(parent, rank, bucket_src, *args):
+        sizes.append(len(bucket_src))
+        return union(parent, rank, bucket_src, *args)
+
+    monkeypatch.setattr(kruskal, '_union_sorted_edges', recording_union)
+    size, total = kruskal.kruskals_streaming(tmp_path / 'edges.csv', tmp_path / 'mst.csv',
+                                             num_nodes=500, chunk_edges=500)
+    assert size == 499 and total == 499
+    assert max(sizes) <= 1000
+
+
+def test_streaming_caps_open_bucket_files(tmp_path, monkeypatch):
+    src, dst, weights = _random_edges(200, 6000, 2)
+    _write_edges(tmp_path / 'edges.csv', src, dst, weights)
+
+    opened = []
+
+    def counting_open(path, mode='r', *args, **kwargs):
+        if 'w' in mode and str(path).endswith('.bin'):
+            opened.append(path)
+        return builtins.open(path, mode, *args, **kwargs)
+
+    monkeypatch.setattr(kruskal, 'MAX_BUCKET_FILES', 8)
+    monkeypatch.setattr(kruskal, 'open', counting_open, raising=False)
+    size, total = kruskal.kruskals_streaming(tmp_path / 'edges.csv', tmp_path / 'mst.csv',
+                                             num_nodes=200, chunk_edges=50)
+    assert len(opened) <= 8
+    assert np.isclose(total, _reference_total(200, src, dst, weights))
+
+
+def test_streaming_sample_and_sparse_nodes(tmp_path, monkeypatch):
+    # More nodes than chunk_edges takes the list-based union find; the
+    # weight sample must stay at WEIGHT_SAMPLE_SIZE however many chunks come
+    src, dst, weights = _random_edges(2000, 8000, 3)
+    _write_edges(tmp_path / 'edges.csv', src, dst, weights)
+
+    sample_sizes = []
+    update = kruskal._reservoir_update
+
+    def recording_update(*args):
+        sample, keys = update(*args)
+        sample_sizes.append(len(sample))
+        return sample, keys
+
+    monkeypatch.setattr(kruskal, 'WEIGHT_SAMPLE_SIZE', 500)
+    monkeypatch.setattr(kruskal, '_reservoir_update', recording_update)
+    size, total = kruskal.kruskals_streaming(tmp_path / 'edges.csv', tmp_path / 'mst.csv',
+                                             num_nodes=2000, chunk_edges=300)
+    assert max(sample_sizes) == 500 and len(sample_sizes) > 20
+    assert np.isclose(total, _reference_total(2000, src, dst, weights))
+    assert size == len(np.loadtxt(tmp_path / 'mst.csv', delimiter=',', ndmin=2))
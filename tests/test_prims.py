@@ -0,0 +1,41 @@
+import numpy as np
+
+import prims_trial2
+from graph_core import CSRGraph
+
+
+def _random_forest_graph(n, m, seed):
+    # Two separate random components, so prims has to return a forest
+    rng = np.random.default_rng(seed)
+    graph = {i: [] for i in range(n)}
+    for _ in range(m):
+        u, v = rng.integers(0, n // 2, 2).tolist()
+        if rng.random() < 0.5:
+            u, v = u + n // 2, v + n // 2
+        if u != v:
+            w = float(rng.random())
+            graph[u].append((v, w))
+            graph[v].append((u, w))
+    return graph
+
+
+def test_prims_csr_matches_dict():
+    edges, total = prims_trial2.prims(prims_trial2.graph, 'A')
+    csr = CSRGraph.from_dict(prims_trial2.graph)
+    assert prims_trial2.prims(csr, 'A') == (edges, total)
+
+    for seed in range(5):
+        graph = _random_forest_graph(80, 300, seed)
+        edges, total = prims_trial2.prims(graph, 3)
+        csr_edges, csr_total = prims_trial2.prims(CSRGraph.from_dict(graph), 3)
+        assert np.isclose(csr_total, total)
+        assert len(csr_edges) == len(edges)
+
+
+def test_prims_dense_matches_prims():
+    points = np.random.default_rng(1).random((40, 2))
+    weights = np.hypot(*(points[:, None] - points[None]).transpose(2, 0, 1))
+    graph = {i: [(j, weights[i, j]) for j in range(40) if j != i] for i in range(40)}
+    _, total = prims_trial2.prims(graph, 0)
+    assert np.isclose(prims_trial2.prims_dense(coordinates=points)[1], total)
+    assert np.isclose(prims_trial2.prims_dense(weight_matrix=weights)[1], total)
@@ -0,0 +1,200 @@
+import numpy as np
+import pytest
+
+import tsp_starter
+from solver_stats import SolverStats
+
+# Three cities on (0, 0): a KD-tree query need not return a city first in
+# its own neighbour list when another city has the same coordinates
+DUPLICATE_CITIES = np.array([[0, 0], [1, 1], [0, 0], [2, 2], [0, 0], [3, 1], [1, 3], [2, 0]],
+                            dtype=float)
+
+
+def test_neighbor_lists_exclude_self_with_duplicates():
+    neighbors = tsp_starter.build_neighbor_lists(DUPLICATE_CITIES, 3)
+    assert neighbors.shape == (8, 3)
+    for city, row in enumerate(neighbors):
+        assert city not in row
+        assert len(set(row.tolist())) == 3
+
+
+def test_neighbor_lists_more_duplicates_than_k():
+    cities = np.vstack([np.zeros((6, 2)), [[1, 1], [2, 2]]])
+    neighbors = tsp_starter.build_neighbor_lists(cities, 2)
+    for city, row in enumerate(neighbors):
+        assert city not in row
+
+
+def test_2opt_neighbors_terminates_with_duplicates():
+    # The time limit only keeps a regression from hanging the run; a self
+    # move would be "applied" over and over until it expires
+    stats = SolverStats()
+    neighbors = tsp_starter.build_neighbor_lists(DUPLICATE_CITIES, 10)
+    solution = tsp_starter.solve_2opt_neighbors(DUPLICATE_CITIES, np.arange(8), neighbors,
+                                                time_limit=5, stats=stats)
+    assert stats.counters['two_opt_applied'] < 50
+    assert sorted(solution.tolist()) == list(range(8))
+    assert tsp_starter.score_solution(DUPLICATE_CITIES, solution) <= \
+        tsp_starter.score_solution(DUPLICATE_CITIES, np.arange(8))
+
+
+def _pipeline_inputs():
+    rng = np.random.default_rng(0)
+    small = tsp_starter.read_cities('TSP/small.csv', cache=False)
+    yield np.vstack([small, small[:10]])
+    yield rng.integers(0, 20, (200, 2)).astype(float)
+
+
+def test_smart_pipeline_terminates_with_duplicates():
+    for cities in _pipeline_inputs():
+        stats = SolverStats()
+        solution = tsp_starter.tsp_solver_smart(cities, neighbors=10, time_limit=5, stats=stats)
+        assert sorted(solution.tolist()) == list(range(len(cities)))
+        assert stats.counters['lk_examined'] < 20 * len(cities)
+        assert stats.counters['or_opt_examined'] < 20 * len(cities)
+
+
+def test_lin_kernighan_with_self_in_neighbor_list():
+    # Hand-made lists that include the city itself must not loop either
+    cities = DUPLICATE_CITIES
+    neighbors = np.array([[i] + [j for j in range(8) if j != i][:4] for i in range(8)])
+    stats = SolverStats()
+    solution = tsp_starter.solve_lin_kernighan(cities, np.arange(8), neighbors,
+                                               time_limit=5, stats=stats)
+    assert sorted(solution.tolist()) == list(range(8))
+    assert stats.counters['lk_applied'] < 50
+
+
+def test_parallel_restarts_with_duplicates():
+    cities = np.vstack([DUPLICATE_CITIES] * 3)
+    solution, report = tsp_starter.tsp_solver_parallel(cities, workers=2, time_limit=1,
+                                                       max_restarts=3, seed=0)
+    assert sorted(solution.tolist()) == list(range(len(cities)))
+    assert all(worker['restarts'] == 3 for worker in report)
+
+
+def test_read_cities_cache_is_a_separate_sidecar(tmp_path):
+    cities = np.random.default_rng(0).random((50, 2))
+    np.savetxt(tmp_path / 'data.csv', cities, delimiter=',')
+    own = np.arange(6.0)
+    np.save(tmp_path / 'data.npy', own)
+
+    first = tsp_starter.read_cities(tmp_path / 'data.csv')
+    second = tsp_starter.read_cities(tmp_path / 'data.csv')
+    assert isinstance(second, np.memmap)
+    assert np.allclose(first, cities) and np.allclose(second, cities)
+    # The user's own data.npy is neither read nor overwritten
+    assert np.array_equal(np.load(tmp_path / 'data.npy'), own)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['data.csv', 'data.csv.npy', 'data.npy']
+
+
+def _optimal_length(cities):
+    from itertools import permutations
+    return min(tsp_starter.score_solution(cities, np.array((0,) + rest))
+               for rest in permutations(range(1, len(cities))))
+
+
+def test_christofides_exact_within_bound():
+    rng = np.random.default_rng(5)
+    for _ in range(10):
+        cities = rng.random((8, 2)) * 10
+        solution = tsp_starter.solve_christofides(cities)
+        assert sorted(solution.tolist()) == list(range(8))
+        assert tsp_starter.score_solution(cities, solution) <= 1.5 * _optimal_length(cities) + 1e-9
+
+
+def test_christofides_matchings_give_tours():
+    cities = np.vstack([np.random.default_rng(6).random((300, 2)), DUPLICATE_CITIES])
+    for matching in tsp_starter.CHRISTOFIDES_MATCHINGS:
+        solution = tsp_starter.solve_christofides(cities, matching)
+        assert sorted(solution.tolist()) == list(range(len(cities)))
+    with pytest.raises(ValueError):
+        tsp_starter.solve_christofides(cities, 'approximate')
+    with pytest.raises(ValueError):
+        tsp_starter.tsp_solver_smart(cities, construction='christofides', workers=2)
+
+
+def _old_nearest_neighbor(cities):
+    # The brute-force version solve_nearest_neighbor replaced
+    from scipy.spatial.distance import euclidean
+
+    unvisited = set(range(1, len(cities)))
+    current_city = 0
+    solution = [0]
+    while unvisited:
+        best_dist = float('inf')
+        nearest = None
+        for candidate in unvisited:
+            d = euclidean(cities[current_city], cities[candidate])
+            if d < best_dist:
+                best_dist = d
+                nearest = candidate
+        solution.append(nearest)
+        unvisited.remove(nearest)
+        current_city = nearest
+    return np.array(solution)
+
+
+def test_nearest_neighbor_matches_brute_force():
+    rng = np.random.default_rng(7)
+    for seed in range(20):
+        n = int(rng.integers(2, 300))
+        if seed % 2:
+            # Integer grid with repeats: lots of equal distances
+            cities = rng.integers(0, 8, (n, 2)).astype(float)
+        else:
+            cities = rng.random((n, 2)) * 1000
+        solution = tsp_starter.solve_nearest_neighbor(cities)
+        assert solution.tolist() == _old_nearest_neighbor(cities).tolist()
+
+
+def _cycle_edges(sequence):
+    return {frozenset(edge) for edge in zip(sequence, sequence[1:] + sequence[:1])}
+
+
+def _reverse_reference(sequence, first, last):
+    # Reverse the forward path first..last of a plain list, wrapping around
+    i, j = sequence.index(first), sequence.index(last)
+    rotated = sequence[i:] + sequence[:i]
+    k = (j - i) % len(sequence)
+    return rotated[:k + 1][::-1] + rotated[k + 1:]
+
+
+def _check_tour(tour, reference):
+    sequence = list(tour)
+    assert sorted(sequence) == sorted(reference)
+    assert _cycle_edges(sequence) == _cycle_edges(reference)
+    position = {city: i for i, city in enumerate(sequence)}
+    n = len(sequence)
+    for i, city in enumerate(sequence):
+        assert tour.next(city) == sequence[(i + 1) % n]
+        assert tour.prev(city) == sequence[i - 1]
+    rng = np.random.default_rng(len(reference))
+    for a, b, c in rng.choice(sequence, (30, 3)).tolist():
+        expected = (position[b] - position[a]) % n <= (position[c] - position[a]) % n
+        assert tour.between(a, b, c) == expected
+
+
+def test_tour_reverse_matches_list_reference():
+    rng = np.random.default_rng(8)
+    for n in (2, 3, 9, 50, 200):
+        reference = rng.permutation(n).tolist()
+        tour = tsp_starter.Tour(reference)
+        _check_tour(tour, reference)
+        for step in range(300):
+            first, last = rng.choice(n, 2).tolist()
+            if step % 3 == 0:
+                # reverse_path with `before` on either side of the path
+                before = tour.prev(first)
+                tour.reverse_path(before, first, last)
+                reference = _reverse_reference(reference, first, last) \
+                    if reference[reference.index(first) - 1] == before \
+                    else _reverse_reference(reference, last, first)
+            else:
+                # The forward path from first to last in the tour's own
+                # orientation, which may be the reverse of the reference's
+                sequence = list(tour)
+                tour.reverse(first, last)
+                reference = _reverse_reference(sequence, first, last)
+            _check_tour(tour, reference)
+        assert np.array_equal(tour.to_array(), np.array(list(tour)))
@@ -0,0 +1,39 @@
+import numpy as np
+
+import welsh_powell
+
+
+def _random_graph(n, degree, seed):
+    rng = np.random.default_rng(seed)
+    m = n * degree // 2
+    u, v = rng.integers(0, n, m), rng.integers(0, n, m)
+    graph = {i: set() for i in range(n)}
+    for a, b in zip(u.tolist(), v.tolist()):
+        if a != b:
+            graph[a].add(b)
+            graph[b].add(a)
+    return graph
+
+
+def _is_proper(graph, coloring):
+    return all(coloring[u] != coloring[v] for u in graph for v in graph[u])
+
+
+def test_methods_give_proper_colorings():
+    graph = _random_graph(500, 8, 0)
+    for method in welsh_powell.COLORING_METHODS:
+        coloring, report = welsh_powell.color_graph(graph, method=method, seed=0)
+        assert _is_proper(graph, coloring)
+        assert report['colors'] == max(coloring.values()) + 1
+
+
+def test_jones_plassmann_reproducible_across_workers():
+    graph = _random_graph(3000, 10, 1)
+    _, offsets, neighbors, _ = welsh_powell.adjacency_arrays(graph)
+    serial, serial_rounds = welsh_powell.jones_plassmann_arrays(offsets, neighbors, workers=1,
+                                                                seed=3)
+    for _ in range(3):
+        parallel, rounds = welsh_powell.jones_plassmann_arrays(offsets, neighbors, workers=4,
+                                                               seed=3)
+        assert rounds == serial_rounds
+        assert np.array_equal(parallel, serial)
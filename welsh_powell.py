@@ -0,0 +1,295 @@
+"""
+Headless graph coloring: Welsh-Powell, DSATUR and Jones-Plassmann.
+
+The graph is turned into a compact CSR adjacency (an offsets array and a
+neighbors array over integer-relabelled vertices). Colors are handed out one
+at a time in the usual Welsh-Powell order; a per-vertex array records the
+last color one of its neighbours received, so checking whether a vertex can
+take the current color is O(1) and the whole run is O(V * colors + E).
+
+`color_graph` is the common entry point for all three methods and also
+reports the number of colors used and the runtime. Each function accepts an
+optional SolverStats as `stats` for phase timings and operation counters.
+"""
+import heapq
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from array_io import attach_shared_arrays, share_array, shared_arrays
+from graph_core import CSRGraph
+from solver_stats import phase
+
+
+def adjacency_arrays(graph, nodes=None):
+    """
+    Builds (nodes, offsets, neighbors, degree) for a networkx graph or a
+    dict {node: neighbours}. Neighbours may be given as plain nodes or as
+    (node, weight) tuples as in the other scripts in this repository.
+    A CSRGraph is used as is.
+    """
+    if isinstance(graph, CSRGraph) and (nodes is None or list(nodes) == graph.nodes):
+        return graph.nodes, graph.offsets, graph.neighbors, graph.degrees()
+
+    if nodes is None:
+        nodes = list(graph)
+    else:
+        nodes = list(nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+
+    counts = np.zeros(len(nodes) + 1, dtype=np.int64)
+    flat = []
+    for i, node in enumerate(nodes):
+        for neighbor in graph[node]:
+            if isinstance(neighbor, tuple):
+                neighbor = neighbor[0]
+            if neighbor in index:
+                flat.append(index[neighbor])
+                counts[i + 1] += 1
+
+    offsets = np.cumsum(counts)
+    neighbors = np.array(flat, dtype=np.int64)
+    if hasattr(graph, 'degree'):
+        degree = np.array([graph.degree[node] for node in nodes], dtype=np.int64)
+    else:
+        degree = np.diff(offsets)
+    return nodes, offsets, neighbors, degree
+
+
+def welsh_powell_arrays(offsets, neighbors, degree=None, stats=None):
+    """
+    Welsh-Powell on a CSR adjacency. Returns an array with the color index
+    of every vertex.
+    """
+    num_nodes = len(offsets) - 1
+    if degree is None:
+        degree = np.diff(offsets)
+    order = np.argsort(-np.asarray(degree), kind='stable').tolist()
+    offsets = offsets.tolist()
+
+    colors = np.full(num_nodes, -1, dtype=np.int64)
+    # blocked[v] == c means a neighbour of v already has color c
+    blocked = np.full(num_nodes, -1, dtype=np.int64)
+    current_color = 0
+
+    while order:
+        if stats is not None:
+            stats.count('conflicts_checked', len(order))
+        remaining = []
+        for node in order:
+            if blocked[node] == current_color:
+                remaining.append(node)
+                continue
+            colors[node] = current_color
+            blocked[neighbors[offsets[node]:offsets[node + 1]]] = current_color
+        if stats is not None:
+            stats.count('conflicts_found', len(remaining))
+        order = remaining
+        current_color += 1
+
+    return colors
+
+
+def welsh_powell(graph, nodes=None, stats=None):
+    """
+    Runs the Welsh-Powell algorithm.
+    Returns a dict: {node: color_index}
+    """
+    with phase(stats, 'adjacency'):
+        nodes, offsets, neighbors, degree = adjacency_arrays(graph, nodes)
+    with phase(stats, 'coloring'):
+        colors = welsh_powell_arrays(offsets, neighbors, degree, stats)
+    order = np.argsort(-degree, kind='stable')
+    return {nodes[i]: int(colors[i]) for i in order}
+
+
+def dsatur_arrays(offsets, neighbors, degree=None, stats=None):
+    """
+    DSATUR on a CSR adjacency: always color the vertex with the most
+    distinct neighbour colors (ties: higher degree, then lower index) with
+    the smallest color its neighbours do not use. The neighbour colors of a
+    vertex are kept as an integer bitset and the next vertex comes from a
+    heap with lazy deletion, so a run is O((V + E) log V).
+    """
+    num_nodes = len(offsets) - 1
+    if degree is None:
+        degree = np.diff(offsets)
+    degree = np.asarray(degree).tolist()
+    offsets = offsets.tolist()
+    neighbors = neighbors.tolist()
+
+    colors = [-1] * num_nodes
+    used = [0] * num_nodes
+    saturation = [0] * num_nodes
+    heap = [(0, -degree[v], v) for v in range(num_nodes)]
+    heapq.heapify(heap)
+
+    while heap:
+        neg_sat, _, node = heapq.heappop(heap)
+        if colors[node] != -1 or -neg_sat != saturation[node]:
+            continue
+
+        bits = used[node]
+        color = (~bits & (bits + 1)).bit_length() - 1
+        colors[node] = color
+
+        mask = 1 << color
+        for neighbor in neighbors[offsets[node]:offsets[node + 1]]:
+            if colors[neighbor] == -1 and not used[neighbor] & mask:
+                used[neighbor] |= mask
+                saturation[neighbor] += 1
+                heapq.heappush(heap, (-saturation[neighbor], -degree[neighbor], neighbor))
+
+    if stats is not None:
+        # one push per vertex up front and one per saturation increase; each
+        # colored vertex checks every neighbour for a conflict with its color
+        stats.count('heap_pushes', num_nodes + sum(saturation))
+        stats.count('conflicts_checked', len(neighbors))
+
+    return np.array(colors, dtype=np.int64)
+
+
+def _jp_round(start, end, arrays=None):
+    """
+    One Jones-Plassmann round over vertices [start, end): every uncolored
+    vertex whose priority beats all its uncolored neighbours picks the
+    smallest color missing among its neighbours. Returns (vertices, colors).
+    """
+    if arrays is None:
+        arrays = shared_arrays
+    offsets, neighbors = arrays['offsets'], arrays['neighbors']
+    priority, colors = arrays['priority'], arrays['colors']
+
+    lo, hi = offsets[start], offsets[end]
+    src = np.repeat(np.arange(start, end), np.diff(offsets[start:end + 1]))
+    dst = neighbors[lo:hi]
+
+    beaten = (colors[dst] == -1) & (priority[dst] > priority[src])
+    selected = np.zeros(end - start, dtype=bool)
+    selected[colors[start:end] == -1] = True
+    selected[src[beaten] - start] = False
+    vertices = np.flatnonzero(selected) + start
+
+    # Smallest missing color: the distinct colors around a vertex, sorted,
+    # match their rank exactly up to the first gap
+    mask = selected[src - start] & (colors[dst] >= 0)
+    pairs = np.unique(np.stack([src[mask], colors[dst[mask]]], axis=1), axis=0)
+    run_start = np.searchsorted(pairs[:, 0], pairs[:, 0], side='left')
+    gapless = pairs[:, 1] == np.arange(len(pairs)) - run_start
+    counts = np.zeros(end - start, dtype=np.int64)
+    np.add.at(counts, pairs[gapless, 0] - start, 1)
+    return vertices, counts[vertices - start]
+
+
+def jones_plassmann_arrays(offsets, neighbors, workers=None, seed=None, chunks=None,
+                           stats=None):
+    """
+    Jones-Plassmann coloring on a CSR adjacency. Vertices get random
+    priorities; each round colors the independent set of uncolored vertices
+    that beat all their uncolored neighbours. With `workers` the vertex range
+    is split into chunks processed by a process pool that reads the graph
+    from shared memory. Returns (colors, rounds).
+    """
+    colors, rounds = _jones_plassmann(offsets, neighbors, workers, seed, chunks)
+    if stats is not None:
+        # every round compares each edge's priorities and colors once
+        stats.count('rounds', rounds)
+        stats.count('conflicts_checked', rounds * len(neighbors))
+    return colors, rounds
+
+
+def _jones_plassmann(offsets, neighbors, workers, seed, chunks):
+    num_nodes = len(offsets) - 1
+    rng = np.random.default_rng(seed)
+    arrays = {
+        'offsets': np.asarray(offsets, dtype=np.int64),
+        'neighbors': np.asarray(neighbors, dtype=np.int64),
+        'priority': rng.permutation(num_nodes).astype(np.int64),
+        'colors': np.full(num_nodes, -1, dtype=np.int64),
+    }
+    workers = workers or 1
+    chunks = chunks or workers * 4
+    bounds = np.linspace(0, num_nodes, min(chunks, max(num_nodes, 1)) + 1).astype(int)
+    ranges = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+    rounds = 0
+    if workers <= 1:
+        colors = arrays['colors']
+        while (colors == -1).any():
+            results = [_jp_round(start, end, arrays) for start, end in ranges]
+            for vertices, chosen in results:
+                colors[vertices] = chosen
+            rounds += 1
+        return colors, rounds
+
+    blocks = []
+    try:
+        specs = {}
+        for key, array in arrays.items():
+            shm, specs[key] = share_array(array)
+            blocks.append(shm)
+        colors = np.ndarray(num_nodes, dtype=np.int64, buffer=blocks[-1].buf)
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=attach_shared_arrays,
+                                 initargs=(specs,)) as pool:
+            while (colors == -1).any():
+                starts, ends = zip(*ranges)
+                # Every chunk must read the colors as they were at the start
+                # of the round, so nothing is written until all are back
+                results = list(pool.map(_jp_round, starts, ends))
+                for vertices, chosen in results:
+                    colors[vertices] = chosen
+                rounds += 1
+        colors = colors.copy()
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+    return colors, rounds
+
+
+COLORING_METHODS = ('welsh_powell', 'dsatur', 'jones_plassmann')
+
+# Edge count above which color_graph runs Jones-Plassmann on a process pool
+# when no `workers` are given; smaller graphs are quicker in-process
+JP_POOL_MIN_EDGES = 2_000_000
+
+
+def color_graph(graph, nodes=None, method='welsh_powell', workers=None, seed=None,
+                stats=None):
+    """
+    Colors `graph` (networkx graph or adjacency dict) with one of
+    COLORING_METHODS. `workers` and `seed` only apply to Jones-Plassmann;
+    without `workers` it runs in-process unless the graph has more than
+    JP_POOL_MIN_EDGES edges, in which case one worker per CPU is used.
+    Returns (coloring, report): coloring is {node: color_index} and report
+    holds the method, the number of colors used and the runtime in seconds.
+    A SolverStats passed as `stats` also gets the phase timings and counters.
+    """
+    if method not in COLORING_METHODS:
+        raise ValueError("Unknown coloring method '{}', expected one of {}".format(
+            method, COLORING_METHODS))
+
+    started = time.perf_counter()
+    with phase(stats, 'adjacency'):
+        nodes, offsets, neighbors, degree = adjacency_arrays(graph, nodes)
+    report = {'method': method}
+
+    with phase(stats, 'coloring'):
+        if method == 'welsh_powell':
+            colors = welsh_powell_arrays(offsets, neighbors, degree, stats)
+        elif method == 'dsatur':
+            colors = dsatur_arrays(offsets, neighbors, degree, stats)
+        else:
+            if workers is None:
+                workers = os.cpu_count() if len(neighbors) // 2 > JP_POOL_MIN_EDGES else 1
+            colors, report['rounds'] = jones_plassmann_arrays(
+                offsets, neighbors, workers=workers, seed=seed, stats=stats)
+
+    order = np.argsort(-degree, kind='stable')
+    coloring = {nodes[i]: int(colors[i]) for i in order}
+    report['colors'] = int(colors.max()) + 1 if len(colors) else 0
+    report['runtime'] = time.perf_counter() - started
+    return coloring, report